@@ -0,0 +1,43 @@
+"""
+Configuração do gunicorn: ``gunicorn -c gunicorn.conf.py server.wsgi``.
+
+Com ``GUNICORN_PRELOAD=True`` a aplicação é carregada e aquecida uma vez no
+master, antes do fork (os workers herdam imports e caches já prontos); cada
+worker só abre as próprias conexões em ``post_worker_init``.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+# Para o stream SSE (/api/tasks/events/), sirva server.asgi com
+# GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker: conexões ociosas ficam
+# no event loop em vez de ocupar um worker síncrono cada. Com o worker sync, cada
+# conexão só devolve o backlog e encerra (o EventSource reconecta após retry).
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+# Reciclagem de workers com jitter para que não reiniciem todos juntos.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.db import connections
+
+    from todos.warmup import warmup
+
+    warmup(connect=False)
+    # Nada de conexão aberta no master: o fork a compartilharia entre workers.
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    from todos.warmup import warmup
+
+    # Sem preload, o worker faz o aquecimento completo; com preload, as etapas
+    # do processo já vieram do master e custam quase nada.
+    warmup(connect=True)
@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 from corsheaders.defaults import default_headers, default_methods
 
@@ -32,16 +33,25 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+  "todos.middleware.MetricsMiddleware",
+  "todos.middleware.CompressionMiddleware",
   "corsheaders.middleware.CorsMiddleware",
   "django.middleware.security.SecurityMiddleware",
-  "django.contrib.sessions.middleware.SessionMiddleware",
+  # Versões de todos.middleware: pulam as rotas de LEAN_API_PATHS (API só com JWT).
+  "todos.middleware.SessionMiddleware",
   "django.middleware.common.CommonMiddleware",
-  "django.middleware.csrf.CsrfViewMiddleware",
-  "django.contrib.auth.middleware.AuthenticationMiddleware",
-  "django.contrib.messages.middleware.MessageMiddleware",
+  "todos.middleware.CsrfViewMiddleware",
+  "todos.middleware.AuthenticationMiddleware",
+  "todos.middleware.MessageMiddleware",
   "django.middleware.clickjacking.XFrameOptionsMiddleware",
+  "todos.middleware.ProfilingMiddleware",
 ]
 
+# Perfil enxuto da API: sem sessão, CSRF, auth do Django e mensagens nesses prefixos.
+# O admin (e o resto do site) mantém a pilha completa.
+LEAN_API_ENABLED = os.getenv("LEAN_API_ENABLED", "True") == "True"
+LEAN_API_PATHS = [p.strip() for p in os.getenv("LEAN_API_PATHS", "/api/").split(",") if p.strip()]
+
 # --- CORS / CSRF ---
 # Read from env (comma-separated) or fall back to sane defaults
 _default_cors_origins = [
@@ -83,6 +93,7 @@ CORS_ALLOW_CREDENTIALS = True
 # Allow common custom headers used by browsers/frameworks
 CORS_ALLOW_HEADERS = list(default_headers) + [
     "x-requested-with",
+    "idempotency-key",
 ]
 
 # Allow standard HTTP methods
@@ -124,6 +135,60 @@ DATABASES = {
     }
 }
 
+# Réplicas de leitura (listagem/detalhe/export de tarefas e /auth/me/).
+# Caminhos separados por vírgula; nos testes espelham o default.
+DATABASE_REPLICAS = []
+for _index, _path in enumerate(
+    [p.strip() for p in os.getenv("DATABASE_REPLICA_PATHS", "").split(",") if p.strip()], start=1
+):
+    DATABASES[f"replica{_index}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": _path,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{_index}")
+# Shards por dono (tarefas, checklist, arquivo, idempotência); usuários e auth
+# ficam no default. Migre cada um: manage.py migrate --database shard1.
+DATABASE_SHARDS = []
+for _index, _path in enumerate(
+    [p.strip() for p in os.getenv("DATABASE_SHARD_PATHS", "").split(",") if p.strip()], start=1
+):
+    DATABASES[f"shard{_index}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": _path,
+    }
+    DATABASE_SHARDS.append(f"shard{_index}")
+# Conexões persistentes (s): com 0 o Django fecha a conexão ao fim de cada
+# requisição e a aberta no aquecimento do worker (todos/warmup.py) se perde.
+DATABASE_CONN_MAX_AGE = int(os.getenv("DATABASE_CONN_MAX_AGE", "60"))
+for _alias_settings in DATABASES.values():
+    _alias_settings["CONN_MAX_AGE"] = DATABASE_CONN_MAX_AGE
+    _alias_settings["CONN_HEALTH_CHECKS"] = os.getenv("DATABASE_CONN_HEALTH_CHECKS", "True") == "True"
+DATABASE_ROUTERS = ["todos.shards.ShardRouter", "todos.replicas.ReplicaRouter"]
+# Após uma escrita, as leituras do usuário ficam no primário por este tempo.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+# --- Cache ---
+# Padrão: memória do processo. A marca de leitura no primário (réplicas) vive
+# aqui, então com réplicas o cache precisa ser compartilhado entre os workers
+# (ex.: django.core.cache.backends.redis.RedisCache + redis://...).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND") or "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+if DATABASE_REPLICAS and CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHES:
+    raise ImproperlyConfigured(
+        "DATABASE_REPLICA_PATHS exige um CACHE_BACKEND compartilhado entre os workers "
+        "(ex.: Redis ou Memcached); com cache local, leituras logo após uma escrita "
+        "podem ir para a réplica e não ver a escrita."
+    )
+
 # --- Localização ---
 LANGUAGE_CODE = "pt-br"
 TIME_ZONE = "America/Sao_Paulo"
@@ -145,6 +210,16 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ),
     "EXCEPTION_HANDLER": "todos.exceptions.custom_exception_handler",
+    # orjson quando instalado; sem ele, caem no JSON padrão do DRF.
+    "DEFAULT_RENDERER_CLASSES": (
+        "todos.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "todos.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -152,6 +227,15 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=REFRESH_DAYS),
 }
 
+# --- Política de senha (cadastro e redefinição; ver todos/password_policy.py) ---
+PASSWORD_POLICY = {
+    "MIN_LENGTH": int(os.getenv("PASSWORD_MIN_LENGTH", "8")),
+    "REQUIRE_UPPER": os.getenv("PASSWORD_REQUIRE_UPPER", "True") == "True",
+    "REQUIRE_LOWER": os.getenv("PASSWORD_REQUIRE_LOWER", "True") == "True",
+    "REQUIRE_DIGIT": os.getenv("PASSWORD_REQUIRE_DIGIT", "True") == "True",
+    "REQUIRE_SYMBOL": os.getenv("PASSWORD_REQUIRE_SYMBOL", "True") == "True",
+}
+
 # --- E-mail (console por padrão; token sai no terminal) ---
 EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
 EMAIL_HOST = os.getenv("EMAIL_HOST", "")
@@ -161,10 +245,96 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True") == "True"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@datacake.local")
 
+# --- Métricas (Prometheus em /api/metrics/) ---
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+# Com vários workers (gunicorn), aponte para um diretório compartilhado e limpe-o
+# a cada deploy; cada worker grava ali o próprio snapshot.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "1"))
+# Quem pode coletar: IPs da lista ou ``Authorization: Bearer <METRICS_TOKEN>``.
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# --- Compressão de respostas (gzip; br/zstd se brotli/zstandard instalados) ---
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True") == "True"
+# Ordem de preferência quando o cliente aceita mais de uma.
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVELS = {
+    "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    "br": int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")),
+    "zstd": int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),
+}
+COMPRESSION_CONTENT_TYPES = [
+    "application/json",
+    "application/x-ndjson",
+    "text/",
+    "application/javascript",
+    "application/xml",
+]
+# Respostas com tokens ficam sem compressão (mitiga BREACH); são pequenas mesmo.
+COMPRESSION_EXCLUDE_PATHS = [p.strip() for p in os.getenv("COMPRESSION_EXCLUDE_PATHS", "/api/auth/").split(",") if p.strip()]
+
+# --- Arquivo de tarefas concluídas (manage.py archive_tasks) ---
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+
+# --- Idempotency-Key nas escritas de tarefas (ver todos/idempotency.py) ---
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "True") == "True"
+# Por quanto tempo uma chave responde com a resposta guardada (manage.py prune_idempotency_keys limpa).
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+# Uma chave "em andamento" mais velha que isto é de um worker que morreu
+# (timeout/OOM/deploy) e é liberada; mantenha acima do GUNICORN_TIMEOUT.
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+
+# --- Prontidão (/api/health/ready/; ver todos/health.py) ---
+# Segundos em que o resultado das verificações é reaproveitado em memória.
+HEALTH_READY_TTL = float(os.getenv("HEALTH_READY_TTL", "5"))
+
+# --- Exclusão de contas (DELETE /api/auth/me/ e manage.py delete_account) ---
+# Linhas por DELETE/commit ao esvaziar as tabelas do usuário (ver todos/accounts.py).
+ACCOUNT_DELETE_BATCH_SIZE = int(os.getenv("ACCOUNT_DELETE_BATCH_SIZE", "5000"))
+
+# --- Eventos de tarefas em tempo real (SSE em /api/tasks/events/; ver todos/events.py) ---
+TASK_EVENTS_ENABLED = os.getenv("TASK_EVENTS_ENABLED", "True") == "True"
+# LocalBackend: um único worker; DatabasePollingBackend: vários workers/processos.
+TASK_EVENTS_BACKEND = os.getenv("TASK_EVENTS_BACKEND", "todos.events.DatabasePollingBackend")
+TASK_EVENTS_POLL_INTERVAL = float(os.getenv("TASK_EVENTS_POLL_INTERVAL", "1"))
+TASK_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("TASK_EVENTS_HEARTBEAT_SECONDS", "15"))
+TASK_EVENTS_RETRY_MS = int(os.getenv("TASK_EVENTS_RETRY_MS", "3000"))
+# Encerra o stream após N segundos (o cliente reconecta com Last-Event-ID); 0 = sem limite.
+TASK_EVENTS_MAX_SECONDS = float(os.getenv("TASK_EVENTS_MAX_SECONDS", "0"))
+TASK_EVENTS_RETENTION_DAYS = int(os.getenv("TASK_EVENTS_RETENTION_DAYS", "7"))
+
+# --- Profiling sob demanda (ver todos/profiling.py; resumo: manage.py profile_summary) ---
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+PROFILING_DIR = os.getenv("PROFILING_DIR", str(BASE_DIR / "profiles"))
+# Staff envia "X-Profile: 1" (ou "cprofile"/"sample") para perfilar a requisição.
+PROFILING_HEADER = os.getenv("PROFILING_HEADER", "X-Profile")
+# Fração das requisições perfiladas sem cabeçalho (0 = só sob demanda).
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_MODE = os.getenv("PROFILING_MODE", "cprofile")  # cprofile | sample
+PROFILING_SAMPLE_INTERVAL = float(os.getenv("PROFILING_SAMPLE_INTERVAL", "0.001"))
+PROFILING_PATHS = [p.strip() for p in os.getenv("PROFILING_PATHS", "/api/tasks/,/api/auth/").split(",") if p.strip()]
+
+
+# --- Logging (ver todos/logging_utils.py) ---
+# A escrita sai da requisição: fila + thread. LOG_FORMAT=json emite uma linha JSON por registro.
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Avisos idênticos (mensagem + rota + status): no máximo N por janela; 0 desliga.
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "20"))
+LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", "60"))
 
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "filters": {
+        "sampling": {
+            "()": "todos.logging_utils.SamplingFilter",
+            "burst": LOG_SAMPLE_BURST,
+            "window": LOG_SAMPLE_WINDOW,
+        },
+    },
     "formatters": {
         "verbose": {
             "format": (
@@ -174,11 +344,14 @@ LOGGING = {
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
         "simple": {"format": "[%(levelname)s] %(message)s"},
+        "json": {"()": "todos.logging_utils.JSONFormatter"},
     },
     "handlers": {
         "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "verbose" if DEBUG else "simple",
+            "class": "todos.logging_utils.BackgroundStreamHandler",
+            "queue_size": LOG_QUEUE_SIZE,
+            "filters": ["sampling"],
+            "formatter": "json" if LOG_FORMAT == "json" else ("verbose" if DEBUG else "simple"),
         },
     },
     "loggers": {
@@ -0,0 +1,129 @@
+"""
+Exclusão de contas em lotes.
+
+Apagar um ``User`` pelo ORM faz o ``Collector`` do Django percorrer as
+cascatas em Python (tarefas, checklist, arquivo, eventos, códigos, chaves de
+idempotência), com todas as linhas relacionadas na memória e o lock de escrita do SQLite preso até o
+fim. Aqui cada tabela dependente é esvaziada com
+``DELETE ... WHERE id IN (SELECT id ... LIMIT n)``, um commit por lote, das
+folhas para a raiz; só então o próprio usuário sai pelo ORM, já sem
+dependentes volumosos. A conta é desativada antes do primeiro lote para que
+os tokens parem de valer mesmo se o processo for interrompido no meio.
+Com shards, as tabelas por dono são esvaziadas no shard do usuário, que
+perde também a cópia da linha do usuário.
+"""
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+
+from . import shards
+
+from .models import (
+    ArchivedTask,
+    ArchivedTaskChecklistItem,
+    EmailVerificationCode,
+    IdempotencyKey,
+    Task,
+    TaskChecklistItem,
+    TaskEvent,
+)
+
+
+def _steps(connection):
+    """``(nome, modelo, condição SQL)`` na ordem de exclusão; ``%s`` = id do usuário."""
+    qn = connection.ops.quote_name
+
+    def by_column(model, field):
+        return f"{qn(model._meta.get_field(field).column)} = %s"
+
+    def by_parent(model, field, parent):
+        return (
+            f"{qn(model._meta.get_field(field).column)} IN ("
+            f"SELECT {qn(parent._meta.pk.column)} FROM {qn(parent._meta.db_table)} "
+            f"WHERE {by_column(parent, 'owner')})"
+        )
+
+    return [
+        ("archived_checklist_items", ArchivedTaskChecklistItem,
+         by_parent(ArchivedTaskChecklistItem, "task", ArchivedTask)),
+        ("archived_tasks", ArchivedTask, by_column(ArchivedTask, "owner")),
+        ("checklist_items", TaskChecklistItem, by_parent(TaskChecklistItem, "task", Task)),
+        ("tasks", Task, by_column(Task, "owner")),
+        ("task_events", TaskEvent, by_column(TaskEvent, "owner")),
+        ("verification_codes", EmailVerificationCode, by_column(EmailVerificationCode, "user")),
+        ("idempotency_keys", IdempotencyKey, by_column(IdempotencyKey, "owner")),
+    ]
+
+
+def _delete_in_batches(connection, using, model, where, params, batch_size):
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    pk = qn(model._meta.pk.column)
+    sql = (
+        f"DELETE FROM {table} WHERE {pk} IN "
+        f"(SELECT {pk} FROM {table} WHERE {where} LIMIT {int(batch_size)})"
+    )
+    while True:
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                deleted = cursor.rowcount
+        yield deleted
+        if deleted < batch_size:
+            return
+
+
+def delete_account(user, batch_size: int | None = None, pause: float = 0.0, progress=None) -> dict:
+    """
+    Remove ``user`` e tudo o que pertence a ele; devolve as linhas removidas
+    por tabela e o total de lotes. ``progress`` recebe ``(nome, removidas)``
+    a cada lote; ``pause`` (s) entre lotes libera o banco para outras escritas.
+    """
+    batch_size = batch_size or settings.ACCOUNT_DELETE_BATCH_SIZE
+    using = router.db_for_write(User)
+    connection = connections[using]
+    User.objects.using(using).filter(pk=user.pk).update(is_active=False)
+    shard = shards.shard_for(user.pk, create=False)
+
+    totals = {"batches": 0}
+    for name, model, where in _steps(connection):
+        totals[name] = 0
+        step_using = shard if shard and shards.is_sharded(model) else using
+        step_connection = connections[step_using]
+        for deleted in _delete_in_batches(step_connection, step_using, model, where, [user.pk], batch_size):
+            totals[name] += deleted
+            totals["batches"] += 1
+            if progress:
+                progress(name, totals[name])
+            if pause and deleted == batch_size:
+                time.sleep(pause)
+
+    # O que sobra (grupos, permissões, log do admin) é pequeno: fica com o ORM.
+    if shard and shard != using:
+        User.objects.using(shard).filter(pk=user.pk).delete()
+    User.objects.using(using).filter(pk=user.pk).delete()
+    return totals
+
+
+def optimize_storage(using: str = "default") -> str | None:
+    """
+    Devolve ao sistema o espaço liberado (``VACUUM``) e atualiza as
+    estatísticas do planejador. Precisa rodar fora de transação.
+    """
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM")
+            cursor.execute("PRAGMA optimize")
+        return "VACUUM; PRAGMA optimize"
+    if connection.vendor == "postgresql":
+        tables = [model._meta.db_table for _, model, _ in _steps(connection)] + [User._meta.db_table]
+        with connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute(f"VACUUM (ANALYZE) {connection.ops.quote_name(table)}")
+        return f"VACUUM (ANALYZE) em {len(tables)} tabelas"
+    return None
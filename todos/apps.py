@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _reserve_shard_ids(sender, using, **kwargs):
+    from .shards import reserve_id_ranges
+
+    reserve_id_ranges(using)
 
 
 class TodosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'todos'
+
+    def ready(self):
+        post_migrate.connect(_reserve_shard_ids, sender=self)
@@ -0,0 +1,93 @@
+"""
+Arquivamento frio de tarefas concluídas.
+
+Tarefas ``concluida`` há mais de N dias (``completed_at``) saem de
+``todos_task`` para ``todos_archivedtask`` — junto com o checklist — em lotes
+de tamanho fixo, um ``transaction.atomic`` por lote: cada lote é um
+``INSERT ... SELECT`` por tabela seguido do ``DELETE``, sem carregar as
+linhas no Python. Ids e horários originais são preservados.
+"""
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import ArchivedTask, ArchivedTaskChecklistItem, Task, TaskChecklistItem
+
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def _columns(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def _copy(connection, source, target, key, ids, extra=None):
+    """``INSERT INTO target (...) SELECT ... FROM source WHERE key IN ids``."""
+    qn = connection.ops.quote_name
+    columns = _columns(source)
+    extra = extra or {}
+    insert_columns = ", ".join(qn(column) for column in [*columns, *extra])
+    select_columns = ", ".join([*(qn(column) for column in columns), *("%s" for _ in extra)])
+    placeholders = ", ".join("%s" for _ in ids)
+    sql = (
+        f"INSERT INTO {qn(target._meta.db_table)} ({insert_columns}) "
+        f"SELECT {select_columns} FROM {qn(source._meta.db_table)} WHERE {qn(key)} IN ({placeholders})"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*extra.values(), *ids])
+
+
+def archivable(older_than_days: int, owner=None):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    queryset = Task.objects.filter(status="concluida", completed_at__lt=cutoff)
+    if owner is not None:
+        queryset = queryset.filter(owner=owner)
+    return queryset
+
+
+def archive_tasks(
+    older_than_days: int,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    owner=None,
+    pause: float = 0.0,
+    progress=None,
+    using: str | None = None,
+) -> dict:
+    """
+    Move as tarefas elegíveis em lotes e devolve ``{"tasks", "checklist_items",
+    "batches"}``. ``pause`` (s) entre lotes libera o banco para outras escritas.
+    ``using``: banco (shard) a percorrer; padrão, o do roteador.
+    """
+    using = using or router.db_for_write(Task)
+    connection = connections[using]
+    archived_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    totals = {"tasks": 0, "checklist_items": 0, "batches": 0}
+
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(
+                archivable(older_than_days, owner)
+                .using(using)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            _copy(connection, Task, ArchivedTask, "id", ids, {"archived_at": archived_at})
+            _copy(connection, TaskChecklistItem, ArchivedTaskChecklistItem, "task_id", ids)
+            items, _ = TaskChecklistItem.objects.using(using).filter(task_id__in=ids).delete()
+            Task.objects.using(using).filter(id__in=ids).delete()
+
+        totals["tasks"] += len(ids)
+        totals["checklist_items"] += items
+        totals["batches"] += 1
+        if progress:
+            progress(totals)
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return totals
@@ -9,6 +9,9 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from .accounts import delete_account
+from .replicas import ReplicaReadMixin
+
 log = logging.getLogger("todos")
 User = get_user_model()
 
@@ -105,8 +108,18 @@ class LogoutView(APIView):
         return Response({"detail": "Logout efetuado. Tokens revogados apenas no cliente."}, status=200)
 
 
-class MeView(APIView):
+class MeView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         return Response(_user_payload(request.user), status=200)
+
+    def delete(self, request):
+        password = request.data.get("password") or ""
+        if not password or not request.user.check_password(password):
+            return Response({"detail": "Senha incorreta."}, status=400)
+
+        user_id = request.user.pk
+        deleted = delete_account(request.user)
+        log.info("Account deleted user_id=%s rows=%s", user_id, deleted)
+        return Response({"detail": "Conta excluida.", "deleted": deleted}, status=200)
@@ -0,0 +1,101 @@
+"""
+Inserção em massa de tarefas e itens de checklist.
+
+As linhas chegam como tuplas na ordem de ``TASK_COLUMNS``/``CHECKLIST_COLUMNS``;
+o ``importance_rank`` das tarefas é calculado aqui a partir de ``importance`` e
+o ``completed_at`` das concluídas é o ``updated_at`` da linha.
+Fora do SQLite usamos ``bulk_create``; no SQLite, ``executemany`` direto.
+Chame sempre dentro de ``transaction.atomic`` do mesmo banco (``using``; padrão:
+o do roteador para ``Task``, o shard do dono no escopo atual).
+"""
+from __future__ import annotations
+
+import datetime
+import json
+
+from django.db import connections, router
+
+from .models import Task, TaskChecklistItem
+
+TASK_COLUMNS = (
+    "owner_id", "title", "description", "status", "importance", "category",
+    "tags", "due_date", "recurrence", "created_at", "updated_at",
+)
+CHECKLIST_COLUMNS = ("task_id", "label", "done", "order")
+_INSERT_COLUMNS = TASK_COLUMNS + ("importance_rank", "completed_at")
+_RANKS = Task.IMPORTANCE_RANKS
+
+
+def insert_tasks(rows: list[tuple], using: str | None = None) -> list[int]:
+    """Insere as tarefas do bloco e devolve os ids na mesma ordem."""
+    using = using or router.db_for_write(Task)
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        tasks = [
+            Task(
+                **dict(zip(TASK_COLUMNS, row)),
+                importance_rank=_RANKS[row[4]],
+                completed_at=row[10] if row[3] == "concluida" else None,
+            )
+            for row in rows
+        ]
+        # ``raw=True`` grava as datas das linhas sem o ``pre_save`` de
+        # ``auto_now``/``auto_now_add`` (o ``bulk_create`` as sobrescreveria).
+        fields = [Task._meta.get_field(name) for name in _INSERT_COLUMNS]
+        batch_size = connection.ops.bulk_batch_size(fields, tasks) or len(tasks)
+        ids = []
+        for start in range(0, len(tasks), batch_size):
+            returned = Task.objects._insert(
+                tasks[start:start + batch_size], fields=fields,
+                returning_fields=[Task._meta.pk], using=using, raw=True,
+            )
+            ids.extend(row[0] for row in returned)
+        return ids
+
+    # No SQLite o ``executemany`` cru é ~10x mais rápido que o ``bulk_create``.
+    # Dentro da transação somos o único escritor, então os ids gerados são
+    # contíguos e terminam no MAX(id) logo após o INSERT.
+    ops = connection.ops
+    table = ops.quote_name(Task._meta.db_table)
+    columns = ", ".join(ops.quote_name(column) for column in _INSERT_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(_INSERT_COLUMNS))
+    dumped_tags = {}
+    adapted = [
+        (
+            owner_id, title, description, status, importance, category,
+            dumped_tags.get(id(tags)) or dumped_tags.setdefault(id(tags), json.dumps(tags)),
+            due_date and due_date.isoformat(), recurrence,
+            _utc_text(created_at), _utc_text(updated_at), _RANKS[importance],
+            _utc_text(updated_at) if status == "concluida" else None,
+        )
+        for owner_id, title, description, status, importance, category, tags, due_date,
+        recurrence, created_at, updated_at in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", adapted)
+        cursor.execute(f"SELECT MAX(id) FROM {table}")
+        last_id = cursor.fetchone()[0]
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+
+def insert_checklist_items(rows: list[tuple], using: str | None = None) -> None:
+    using = using or router.db_for_write(TaskChecklistItem)
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        TaskChecklistItem.objects.using(using).bulk_create(
+            TaskChecklistItem(**dict(zip(CHECKLIST_COLUMNS, row))) for row in rows
+        )
+        return
+
+    ops = connection.ops
+    table = ops.quote_name(TaskChecklistItem._meta.db_table)
+    columns = ", ".join(ops.quote_name(column) for column in CHECKLIST_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s)", rows)
+
+
+def _utc_text(value) -> str:
+    """Mesmo texto que o backend SQLite grava (UTC, sem fuso)."""
+    if value.tzinfo is not None and value.utcoffset():
+        value = value.astimezone(datetime.timezone.utc)
+    return str(value.replace(tzinfo=None))
@@ -0,0 +1,114 @@
+"""
+Codificações de compressão de resposta: gzip sempre; brotli e zstd quando os
+pacotes ``brotli`` e ``zstandard`` estão instalados.
+
+Cada codificação expõe um compressor incremental com ``compress(bytes)`` e
+``flush()``, usado tanto para corpos inteiros quanto para streaming. No
+streaming cada bloco sai com um flush de sincronização (``SYNC_FLUSH``): o
+cliente recebe o bloco na hora, em vez de esperar o buffer do compressor.
+"""
+from __future__ import annotations
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependência opcional
+    zstandard = None
+
+
+class _BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def sync(self):
+        return self._compressor.flush()
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def _gzip(level):
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+def _zstd(level):
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+CODECS = {"gzip": _gzip}
+if brotli is not None:
+    CODECS["br"] = _BrotliCompressor
+if zstandard is not None:
+    CODECS["zstd"] = _zstd
+
+# Esvazia o compressor sem encerrar o stream.
+SYNC_FLUSH = {
+    "gzip": lambda compressor: compressor.flush(zlib.Z_SYNC_FLUSH),
+    "br": lambda compressor: compressor.sync(),
+    "zstd": lambda compressor: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+}
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """``"gzip, br;q=0.8"`` -> ``{"gzip": 1.0, "br": 0.8}``."""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate(header: str, preference) -> str | None:
+    """Escolhe a codificação de maior ``q``; empates seguem ``preference``."""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for name in preference:
+        if name not in CODECS:
+            continue
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(name: str, level: int, data: bytes) -> bytes:
+    compressor = CODECS[name](level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_chunks(name: str, level: int, chunks):
+    compressor = CODECS[name](level)
+    sync = SYNC_FLUSH[name]
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk) + sync(compressor)
+    yield compressor.flush()
+
+
+async def acompress_chunks(name: str, level: int, chunks):
+    compressor = CODECS[name](level)
+    sync = SYNC_FLUSH[name]
+    async for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk) + sync(compressor)
+    yield compressor.flush()
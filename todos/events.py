@@ -0,0 +1,208 @@
+"""
+Eventos de tarefas em tempo real (SSE em ``/api/tasks/events/``).
+
+Cada escrita de tarefa grava um ``TaskEvent`` (o id serve de ``Last-Event-ID``
+na retomada) e acorda o hub deste processo. Há um ``EventHub`` por event loop
+(um por worker ASGI): ele lê os eventos novos da tabela numa única consulta e
+entrega aos streams abertos de cada dono. Conexões ociosas custam só uma
+fila e um gerador — nenhuma consulta por conexão.
+
+Backends (``TASK_EVENTS_BACKEND``) decidem quando o hub consulta a tabela:
+
+- ``LocalBackend``: só quando este processo publica (um único worker);
+- ``DatabasePollingBackend``: também a cada ``TASK_EVENTS_POLL_INTERVAL``,
+  o que entrega eventos publicados por outros workers.
+
+Num worker WSGI o Django consome o gerador inteiro antes de responder, então
+lá o stream não fica aberto (``live=False``): entrega o backlog, marca o
+ponto de retomada e encerra; o ``EventSource`` reconecta após ``retry`` ms.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import TaskEvent
+from .renderers import FastJSONRenderer
+
+EVENT_FIELDS = ("id", "owner_id", "kind", "task_id", "data", "created_at")
+FETCH_LIMIT = 1000
+
+_hubs = weakref.WeakKeyDictionary()
+_hubs_lock = threading.Lock()
+
+
+def publish(owner_id, kind: str, task_id=None, data=None) -> None:
+    """Registra o evento e, após o commit, acorda os hubs deste processo."""
+    if not settings.TASK_EVENTS_ENABLED:
+        return
+    TaskEvent.objects.create(owner_id=owner_id, kind=kind, task_id=task_id, data=data or {})
+    transaction.on_commit(_wake_hubs)
+
+
+def _wake_hubs():
+    with _hubs_lock:
+        hubs = list(_hubs.items())
+    for loop, hub in hubs:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(hub.wake.set)
+
+
+def _latest_id():
+    return TaskEvent.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def _events_after(cursor, owner_id=None, limit=FETCH_LIMIT):
+    events = TaskEvent.objects.filter(id__gt=cursor)
+    if owner_id is not None:
+        events = events.filter(owner_id=owner_id)
+    return list(events.order_by("id").values(*EVENT_FIELDS)[:limit])
+
+
+class LocalBackend:
+    async def wait(self, wake: asyncio.Event):
+        await wake.wait()
+
+
+class DatabasePollingBackend:
+    def __init__(self):
+        self.interval = settings.TASK_EVENTS_POLL_INTERVAL
+
+    async def wait(self, wake: asyncio.Event):
+        try:
+            await asyncio.wait_for(wake.wait(), self.interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+class EventHub:
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.wake = asyncio.Event()
+        self.backend = import_string(settings.TASK_EVENTS_BACKEND)()
+        self.cursor = 0
+        self._task = None
+        # Sem a trava, duas conexões simultâneas passam pelo ``_task is None``
+        # durante o await e sobem dois leitores (eventos em dobro).
+        self._start_lock = asyncio.Lock()
+
+    async def subscribe(self, owner_id) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self.subscribers[owner_id].add(queue)
+        async with self._start_lock:
+            if self._task is None:
+                self.cursor = await sync_to_async(_latest_id)()
+                self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, owner_id, queue):
+        queues = self.subscribers.get(owner_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[owner_id]
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.backend.wait(self.wake)
+            self.wake.clear()
+            events = await sync_to_async(_events_after)(self.cursor)
+            for event in events:
+                for queue in self.subscribers.get(event["owner_id"], ()):
+                    queue.put_nowait(event)
+            if events:
+                self.cursor = events[-1]["id"]
+            if len(events) == FETCH_LIMIT:
+                self.wake.set()
+
+
+def get_hub() -> EventHub:
+    loop = asyncio.get_running_loop()
+    with _hubs_lock:
+        hub = _hubs.get(loop)
+        if hub is None:
+            hub = _hubs[loop] = EventHub()
+    return hub
+
+
+_renderer = FastJSONRenderer()
+
+
+def format_event(event) -> bytes:
+    data = _renderer.render({
+        "id": event["id"],
+        "type": event["kind"],
+        "task_id": event["task_id"],
+        "data": event["data"],
+        "created_at": event["created_at"],
+    })
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event["id"], event["kind"].encode(), data)
+
+
+async def _backlog(owner_id, cursor):
+    while True:
+        backlog = await sync_to_async(_events_after)(cursor, owner_id)
+        for event in backlog:
+            yield event
+        if len(backlog) < FETCH_LIMIT:
+            return
+        cursor = backlog[-1]["id"]
+
+
+async def stream(owner_id, last_event_id=None, live: bool = True):
+    """Gerador SSE: backlog desde ``last_event_id``, eventos ao vivo e heartbeats."""
+    if not live:
+        yield b"retry: %d\n\n" % settings.TASK_EVENTS_RETRY_MS
+        if last_event_id is None:
+            # Primeira conexão: só o id atual, para a reconexão retomar dele.
+            yield b"id: %d\n\n" % await sync_to_async(_latest_id)()
+            return
+        async for event in _backlog(owner_id, last_event_id):
+            yield format_event(event)
+        return
+
+    loop = asyncio.get_running_loop()
+    hub = get_hub()
+    queue = await hub.subscribe(owner_id)
+    # Lido antes de qualquer await: eventos já na fila são posteriores a ele.
+    cursor = hub.cursor
+    max_seconds = settings.TASK_EVENTS_MAX_SECONDS
+    deadline = loop.time() + max_seconds if max_seconds else None
+    try:
+        yield b"retry: %d\n\n" % settings.TASK_EVENTS_RETRY_MS
+        if last_event_id is not None:
+            cursor = last_event_id
+            async for event in _backlog(owner_id, cursor):
+                cursor = event["id"]
+                yield format_event(event)
+
+        while True:
+            timeout = settings.TASK_EVENTS_HEARTBEAT_SECONDS
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                timeout = min(timeout, remaining)
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if deadline is None or loop.time() < deadline:
+                    yield b": ping\n\n"
+                continue
+            # O backlog e o hub podem entregar o mesmo evento.
+            if event["id"] <= cursor:
+                continue
+            cursor = event["id"]
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(owner_id, queue)
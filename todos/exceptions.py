@@ -6,6 +6,24 @@ from rest_framework import status
 
 logger = logging.getLogger(__name__)
 
+
+class _FullPath:
+    """Adia ``get_full_path()`` até o registro ser formatado (se não for descartado)."""
+
+    __slots__ = ("request",)
+
+    def __init__(self, request):
+        self.request = request
+
+    def __str__(self):
+        return self.request.get_full_path() if self.request else "-"
+
+
+def _route(request):
+    match = getattr(request, "resolver_match", None) if request else None
+    return match.view_name if match is not None else None
+
+
 def custom_exception_handler(exc, context):
     """
     Envolve o handler padrão do DRF para:
@@ -24,9 +42,10 @@ def custom_exception_handler(exc, context):
             "Handled error [%s] %s %s -> %s %s",
             view_name,
             req.method if req else "-",
-            req.get_full_path() if req else "-",
+            _FullPath(req),
             response.status_code,
             getattr(exc, "detail", repr(exc)),
+            extra={"route": _route(req), "status_code": response.status_code},
         )
 
         # Normalize a estrutura da resposta para ficar consistente
@@ -44,8 +63,9 @@ def custom_exception_handler(exc, context):
         "Unhandled error [%s] %s %s",
         view_name,
         req.method if req else "-",
-        req.get_full_path() if req else "-",
+        _FullPath(req),
         exc_info=exc,
+        extra={"route": _route(req)},
     )
     return Response(
         {"detail": "Erro interno inesperado. Tente novamente mais tarde."},
@@ -0,0 +1,160 @@
+"""
+Prontidão (``/api/health/ready/``) para o orquestrador e os balanceadores.
+
+Cada verificação mede a própria latência e devolve ``status`` ``ok`` ou
+``fail``: conexão com o primário, as réplicas e os shards, ida e volta no cache,
+migrações pendentes (primário e cada shard), fila do logging em segundo plano e
+atraso da limpeza de eventos SSE. Só as verificações de ``CRITICAL`` derrubam a
+prontidão; as demais (réplicas, shards, limpeza) dependem de estado
+compartilhado por todos os pods — tirar um pod do balanceador não resolve e
+tiraria todos juntos — então só aparecem em ``degraded``. O resultado fica em
+memória por ``HEALTH_READY_TTL`` segundos, então sondagens frequentes de vários
+balanceadores custam uma leitura de dicionário; só uma thread recalcula.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+
+from . import logging_utils
+from .models import TaskEvent
+
+# Fila de logging acima desta fração da capacidade = falha (registros prestes a cair).
+LOG_QUEUE_FAIL_RATIO = 0.9
+# Falhas que derrubam a prontidão (além de ``migrations:*``).
+CRITICAL = frozenset({f"database:{DEFAULT_DB_ALIAS}", "cache", "queues"})
+
+_lock = threading.Lock()
+_cached = None  # (expira_em, resultado)
+_migrated = set()  # aliases já sem migrações pendentes
+
+
+def _database(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return {}
+
+
+def _cache():
+    key = "health:ready"
+    value = str(time.monotonic())
+    cache.set(key, value, 30)
+    if cache.get(key) != value:
+        raise RuntimeError("cache não devolveu o valor gravado")
+    return {}
+
+
+@functools.cache
+def _migration_plan():
+    """
+    Migrações do código, na ordem de aplicação, com as que cada squash
+    substitui. O grafo só muda com novo deploy: montado uma vez por processo.
+    """
+    graph = MigrationLoader(None, ignore_no_migrations=True).graph
+    plan = {}
+    for leaf in graph.leaf_nodes():
+        for key in graph.forwards_plan(leaf):
+            plan.setdefault(key, tuple(graph.nodes[key].replaces or ()))
+    return list(plan.items())
+
+
+def _migrations(alias):
+    # Depois de tudo aplicado, o alias não volta a ter pendências até o próximo deploy.
+    if alias not in _migrated:
+        applied = MigrationRecorder(connections[alias]).applied_migrations()
+        pending = [
+            f"{app_label}.{name}"
+            for (app_label, name), replaces in _migration_plan()
+            if (app_label, name) not in applied and not (replaces and all(key in applied for key in replaces))
+        ]
+        if pending:
+            return {"status": "fail", "pending": pending}
+        _migrated.add(alias)
+    return {"pending": []}
+
+
+def _queues():
+    logs = logging_utils.queue_stats()
+    # Capacidade 0 (LOG_QUEUE_SIZE=0) = fila sem limite: nunca enche.
+    logs_full = any(
+        stats["capacity"] > 0 and stats["size"] >= stats["capacity"] * LOG_QUEUE_FAIL_RATIO for stats in logs
+    )
+    return {"status": "fail" if logs_full else "ok", "logging": logs}
+
+
+def _housekeeping():
+    oldest = TaskEvent.objects.order_by("created_at").values_list("created_at", flat=True).first()
+    event_age = (timezone.now() - oldest).total_seconds() if oldest else 0
+    # Eventos além da retenção (+1 dia de folga) = prune_task_events não está rodando.
+    events_stale = event_age > timedelta(days=settings.TASK_EVENTS_RETENTION_DAYS + 1).total_seconds()
+    return {"status": "fail" if events_stale else "ok", "task_events_oldest_seconds": round(event_age)}
+
+
+def _checks():
+    checks = {f"database:{alias}": (lambda alias=alias: _database(alias))
+              for alias in [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS, *settings.DATABASE_SHARDS]}
+    checks["cache"] = _cache
+    checks.update({f"migrations:{alias}": (lambda alias=alias: _migrations(alias))
+                   for alias in [DEFAULT_DB_ALIAS, *settings.DATABASE_SHARDS]})
+    checks.update({"queues": _queues, "housekeeping": _housekeeping})
+    return checks
+
+
+def _critical(name) -> bool:
+    return name in CRITICAL or name.startswith("migrations:")
+
+
+def run_checks() -> dict:
+    results = {}
+    for name, check in _checks().items():
+        started = time.perf_counter()
+        try:
+            result = {"status": "ok", **check()}
+        except Exception as exc:
+            result = {"status": "fail", "error": f"{type(exc).__name__}: {exc}"}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        results[name] = result
+    failed = [name for name, result in results.items() if result["status"] != "ok"]
+    healthy = not any(_critical(name) for name in failed)
+    return {
+        "status": "ok" if healthy else "fail",
+        "degraded": [name for name in failed if not _critical(name)],
+        "checked_at": timezone.now(),
+        "checks": results,
+    }
+
+
+def readiness() -> tuple[dict, bool]:
+    """Resultado (possivelmente em cache) e se veio do cache."""
+    global _cached
+    cached = _cached
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1], True
+    # Uma thread recalcula; as outras servem o último resultado (ou esperam, se não houver).
+    if not _lock.acquire(blocking=cached is None):
+        return cached[1], True
+    try:
+        cached = _cached
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1], True
+        result = run_checks()
+        _cached = (time.monotonic() + settings.HEALTH_READY_TTL, result)
+        return result, False
+    finally:
+        _lock.release()
+
+
+def reset():
+    global _cached
+    _cached = None
+    _migrated.clear()
@@ -0,0 +1,111 @@
+"""
+Suporte a ``Idempotency-Key`` nas escritas de tarefas.
+
+O cliente móvel repete ``POST`` em redes instáveis; com o cabeçalho, a
+primeira requisição grava uma linha "em andamento" (única por usuário e
+chave) antes de executar a view, o que já serve de trava: uma duplicata
+concorrente recebe 409 com ``Retry-After``. Ao terminar, a resposta é
+guardada e as repetições dentro de ``IDEMPOTENCY_TTL_HOURS`` recebem a mesma
+resposta, sem validar nem escrever de novo (cabeçalho
+``Idempotent-Replayed: true``). A mesma chave com outro método, rota ou corpo
+é recusada com 422. Respostas 5xx e exceções (inclusive de validação)
+liberam a chave para nova tentativa; se o worker morrer no meio (timeout,
+OOM, deploy), a linha "em andamento" vale só por ``IDEMPOTENCY_LEASE_SECONDS``
+e depois disso a repetição executa de novo.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint(request) -> str:
+    digest = hashlib.sha256(f"{request.method} {request.get_full_path()}\n".encode())
+    digest.update(request.body or b"")
+    return digest.hexdigest()
+
+
+def reclaimable(now=None) -> Q:
+    """Chaves que podem ser descartadas: respostas vencidas e "em andamento" sem dono vivo."""
+    now = now or timezone.now()
+    return Q(created_at__lt=now - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)) | Q(
+        status_code__isnull=True,
+        created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+    )
+
+
+def _claim(owner, key, fingerprint):
+    """Grava a chave como "em andamento"; devolve ``(registro, criado?)``."""
+    for _ in range(2):
+        try:
+            with transaction.atomic(using=router.db_for_write(IdempotencyKey)):
+                return IdempotencyKey.objects.create(owner=owner, key=key, fingerprint=fingerprint), True
+        except IntegrityError:
+            expired = reclaimable()
+            existing = IdempotencyKey.objects.filter(owner=owner, key=key).exclude(expired).first()
+            if existing is not None:
+                return existing, False
+            # Expirada (ou apagada no meio do caminho): libera e tenta de novo.
+            IdempotencyKey.objects.filter(expired, owner=owner, key=key).delete()
+    return None, False
+
+
+def idempotent(view_method):
+    """Decora ações do ``TaskViewSet``; sem o cabeçalho, nada muda."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not settings.IDEMPOTENCY_ENABLED:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} deve ter no máximo {MAX_KEY_LENGTH} caracteres."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = _fingerprint(request)
+        record, created = _claim(request.user, key, fingerprint)
+        if record is None or (not created and record.status_code is None):
+            return Response(
+                {"detail": f"Uma requisição com esta {HEADER} ainda está em andamento."},
+                status=status.HTTP_409_CONFLICT,
+                headers={"Retry-After": "1"},
+            )
+        if not created:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {"detail": f"{HEADER} já usada em outra requisição."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            return Response(
+                record.response, status=record.status_code, headers={"Idempotent-Replayed": "true"}
+            )
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            record.status_code = response.status_code
+            record.response = getattr(response, "data", None)
+            record.save(update_fields=["status_code", "response"])
+        return response
+
+    return wrapper
@@ -0,0 +1,202 @@
+"""
+Importação em massa de tarefas a partir de NDJSON ou CSV.
+
+O arquivo é lido linha a linha; cada linha passa pelas mesmas regras do
+``TaskSerializer`` e as válidas são gravadas em blocos (um
+``transaction.atomic`` por bloco). Linhas inválidas entram no relatório sem
+interromper a importação.
+
+Colunas do CSV: ``title, description, status, importance, category, tags,
+due_date, checklist`` — ``tags`` e ``checklist`` separados por ``|``.
+No NDJSON, ``tags`` é uma lista e ``checklist_items`` uma lista de textos ou
+de objetos ``{"label", "done"}``.
+"""
+from __future__ import annotations
+
+import csv
+import functools
+from itertools import islice
+
+from django.db import router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty
+
+from .bulk import insert_checklist_items, insert_tasks
+from .models import Task
+from .parsers import loads
+from .serializers import (
+    TaskSerializer,
+    clean_checklist_label,
+    clean_description,
+    clean_tags,
+    clean_title,
+)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+_FIELDS = ("title", "description", "status", "importance", "category", "tags", "due_date")
+_CLEANERS = {"title": clean_title, "description": clean_description, "tags": clean_tags}
+_DEFAULTS = {
+    "description": "",
+    "status": "pendente",
+    "importance": "media",
+    "category": "pessoal",
+    "tags": [],
+    "due_date": None,
+}
+
+
+@functools.cache
+def _serializer_fields():
+    """Campos do ``TaskSerializer`` (instanciados uma vez) para validar cada linha."""
+    fields = TaskSerializer().fields
+    return fields, fields["checklist_items"].child.fields
+
+
+def _messages(exc):
+    detail = exc.detail
+    return [str(message) for message in (detail if isinstance(detail, list) else [detail])]
+
+
+class RowError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def detect_format(name: str | None, content_type: str | None) -> str | None:
+    name = (name or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    return None
+
+
+def _text_lines(byte_lines):
+    first = True
+    for raw in byte_lines:
+        yield raw.decode("utf-8-sig" if first else "utf-8", errors="replace")
+        first = False
+
+
+def _ndjson_records(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except ValueError:
+            yield number, RowError({"non_field_errors": ["JSON inválido."]})
+            continue
+        if not isinstance(record, dict):
+            yield number, RowError({"non_field_errors": ["Cada linha deve ser um objeto JSON."]})
+            continue
+        yield number, record
+
+
+def _split(value):
+    return [part for part in (value or "").split("|") if part.strip()]
+
+
+def _csv_records(lines):
+    reader = csv.DictReader(lines)
+    for row in reader:
+        if not any((value or "").strip() for value in row.values() if isinstance(value, str)):
+            continue
+        # Célula vazia = campo ausente (vale o padrão do modelo).
+        record = {key: value for key, value in row.items() if key and value not in (None, "")}
+        if "tags" in record:
+            record["tags"] = _split(record["tags"])
+        if "checklist" in record:
+            record["checklist_items"] = _split(record.pop("checklist"))
+        yield reader.line_num, record
+
+
+def clean_record(record: dict) -> tuple[dict, list[tuple[str, bool]]]:
+    """Valida uma linha; devolve os campos da tarefa e os itens ``(label, done)``."""
+    task_fields, item_fields = _serializer_fields()
+    errors = {}
+    cleaned = {}
+
+    for name in _FIELDS:
+        try:
+            value = task_fields[name].run_validation(record.get(name, empty))
+            cleaner = _CLEANERS.get(name)
+            cleaned[name] = cleaner(value) if cleaner else value
+        except SkipField:
+            cleaned[name] = _DEFAULTS[name]
+        except serializers.ValidationError as exc:
+            errors[name] = _messages(exc)
+
+    items = []
+    raw_items = record.get("checklist_items") or []
+    if not isinstance(raw_items, list):
+        raw_items = [raw_items]
+    for item in raw_items:
+        if not isinstance(item, dict):
+            item = {"label": item}
+        try:
+            label = item_fields["label"].run_validation(item.get("label", empty))
+            label = clean_checklist_label(label)
+            done = item_fields["done"].run_validation(item.get("done", False))
+        except serializers.ValidationError as exc:
+            errors["checklist_items"] = _messages(exc)
+            break
+        items.append((label, done))
+
+    if errors:
+        raise RowError(errors)
+    return cleaned, items
+
+
+def import_tasks(owner, byte_lines, fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """Importa as linhas para ``owner`` e devolve o relatório da execução."""
+    lines = _text_lines(byte_lines)
+    records = _ndjson_records(lines) if fmt == "ndjson" else _csv_records(lines)
+    created = failed = 0
+    errors = []
+
+    def valid_rows():
+        nonlocal failed
+        for number, record in records:
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                yield clean_record(record)
+            except RowError as exc:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": number, "errors": exc.errors})
+
+    rows = valid_rows()
+    while chunk := list(islice(rows, chunk_size)):
+        now = timezone.now()
+        with transaction.atomic(using=router.db_for_write(Task)):
+            task_ids = insert_tasks([
+                (
+                    owner.id, data["title"], data["description"], data["status"],
+                    data["importance"], data["category"], data["tags"], data["due_date"],
+                    "nenhuma", now, now,
+                )
+                for data, _ in chunk
+            ])
+            items = [
+                (task_id, label, done, order)
+                for task_id, (_, task_items) in zip(task_ids, chunk)
+                for order, (label, done) in enumerate(task_items)
+            ]
+            if items:
+                insert_checklist_items(items)
+        created += len(chunk)
+
+    return {
+        "created": created,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }
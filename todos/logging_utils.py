@@ -0,0 +1,188 @@
+"""
+Logging sem I/O no caminho da requisição.
+
+``BackgroundStreamHandler`` só enfileira o registro (``QueueHandler``); a
+formatação e a escrita no stream acontecem numa thread ``QueueListener``.
+Com a fila cheia o registro é descartado e contado em ``dropped`` em vez de
+bloquear a requisição. ``SamplingFilter`` deixa passar no máximo ``burst``
+avisos idênticos (mesma mensagem, rota e status) por janela e anota quantos
+foram suprimidos no próximo que passar. ``JSONFormatter`` emite uma linha JSON
+por registro.
+
+Este módulo é carregado pelo ``LOGGING`` antes dos apps: nada de modelos aqui.
+"""
+from __future__ import annotations
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Atributos padrão do LogRecord; o resto veio de ``extra=`` e vai para o JSON.
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request"}
+
+_handlers = weakref.WeakSet()
+
+
+def _route(record) -> str | None:
+    route = getattr(record, "route", None)
+    if route is not None:
+        return route
+    request = getattr(record, "request", None)  # django.request passa o HttpRequest
+    if request is None:
+        return None
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else getattr(request, "path_info", None)
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.pathname}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Amostra registros repetidos do nível ``level``: até ``burst`` por chave
+    (logger, mensagem, rota, status) a cada ``window`` segundos. ``burst=0``
+    desliga a amostragem.
+    """
+
+    MAX_KEYS = 10_000
+
+    def __init__(self, burst: int = 10, window: float = 60.0, level: str = "WARNING"):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0 or record.levelno != self.level:
+            return True
+        key = (record.name, record.msg, _route(record), getattr(record, "status_code", None))
+        now = time.monotonic()
+        with self._lock:
+            if len(self._seen) >= self.MAX_KEYS:
+                self._seen.clear()
+            start, count, suppressed = self._seen.get(key, (now, 0, 0))
+            previous = 0
+            if now - start >= self.window:
+                start, count, previous, suppressed = now, 0, suppressed, 0
+            if count >= self.burst:
+                self._seen[key] = (start, count, suppressed + 1)
+                return False
+            self._seen[key] = (start, count + 1, suppressed)
+        if previous:
+            record.suppressed = previous
+        return True
+
+
+class BackgroundStreamHandler(QueueHandler):
+    """
+    ``QueueHandler`` com o próprio ``QueueListener``: quem loga só paga o
+    ``put_nowait``. O formatter configurado vale para a escrita na thread.
+    """
+
+    def __init__(self, stream=None, queue_size: int = 10_000):
+        self.queue_size = queue_size
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        super().__init__(queue.Queue(queue_size))
+        self._start()
+        _handlers.add(self)
+
+    def _start(self):
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def _restart_after_fork(self):
+        # A thread do listener não sobrevive ao fork (ex.: gunicorn --preload).
+        self.queue = queue.Queue(self.queue_size)
+        self._start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Congela mensagem e traceback aqui (os args podem mudar depois);
+        # a formatação completa fica com a thread.
+        record = copy.copy(record)
+        route = _route(record)
+        if route is not None:
+            record.route = route
+        record.__dict__.pop("request", None)
+        record.msg = record.getMessage()
+        record.args = None
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            record.msg += f" (+{suppressed} similar suppressed)"
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Espera a thread escrever tudo o que já foi enfileirado."""
+        if self.listener._thread is not None:
+            self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        _handlers.discard(self)
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+
+def queue_stats() -> list[dict]:
+    """Ocupação das filas dos ``BackgroundStreamHandler`` ativos."""
+    return [
+        {"size": handler.queue.qsize(), "capacity": handler.queue_size, "dropped": handler.dropped}
+        for handler in list(_handlers)
+    ]
+
+
+@atexit.register
+def _stop_listeners():
+    for handler in list(_handlers):
+        handler.close()
+
+
+def _restart_listeners():
+    for handler in list(_handlers):
+        handler._restart_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listeners)
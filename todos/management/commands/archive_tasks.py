@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from todos import shards
+from todos.archive import ARCHIVE_BATCH_SIZE, archivable, archive_tasks
+
+
+class Command(BaseCommand):
+    help = "Move tarefas concluídas antigas (e o checklist) para as tabelas de arquivo"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Idade mínima (dias desde a conclusão; padrão: ARCHIVE_AFTER_DAYS).")
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--user", help="Só as tarefas deste usuário (username ou e-mail).")
+        parser.add_argument("--pause", type=float, default=0.0, help="Segundos de pausa entre lotes.")
+        parser.add_argument("--dry-run", action="store_true", help="Só conta as tarefas elegíveis.")
+
+    def handle(self, *args, **opts):
+        days = opts["days"] if opts["days"] is not None else settings.ARCHIVE_AFTER_DAYS
+        owner = None
+        if opts["user"]:
+            owner = User.objects.filter(
+                Q(username__iexact=opts["user"]) | Q(email__iexact=opts["user"])
+            ).first()
+            if owner is None:
+                raise CommandError(f"Usuário '{opts['user']}' não encontrado.")
+
+        # Com shards: só o do usuário, ou todos, um de cada vez.
+        if owner is not None:
+            databases = [shards.shard_for(owner.pk, create=False) or "default"]
+        else:
+            databases = shards.databases()
+
+        if opts["dry_run"]:
+            count = sum(archivable(days, owner).using(alias).count() for alias in databases)
+            self.stdout.write(f"{count} tarefas concluídas há mais de {days} dias seriam arquivadas.")
+            return
+
+        started = time.perf_counter()
+        totals = {"tasks": 0, "checklist_items": 0, "batches": 0}
+        for alias in databases:
+            done = archive_tasks(
+                days,
+                batch_size=opts["batch_size"],
+                owner=owner,
+                pause=opts["pause"],
+                progress=lambda totals, alias=alias: self.stdout.write(
+                    f"  {alias} lote {totals['batches']}: {totals['tasks']} tarefas"
+                ),
+                using=alias,
+            )
+            for key in totals:
+                totals[key] += done[key]
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['tasks']} tarefas e {totals['checklist_items']} itens de checklist arquivados "
+            f"em {totals['batches']} lotes ({time.perf_counter() - started:.1f}s)."
+        ))
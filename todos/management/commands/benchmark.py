@@ -0,0 +1,368 @@
+"""
+Benchmark das rotas quentes da API.
+
+Cria um banco de teste descartável, popula com ``bulk_seed`` e dispara as
+rotas de tarefas e de autenticação pelo ``django.test.Client`` e/ou por um
+servidor WSGI local. O resultado (latência p50/p95/p99, req/s e consultas SQL
+por requisição) sai em JSON para comparar versões.
+
+Suítes (``--suite``): ``api`` mede as rotas; ``render`` compara o
+``JSONRenderer`` do DRF com o ``FastJSONRenderer`` sobre listas grandes do
+``TaskSerializer``; ``compression`` mede CPU e tamanho de cada codificação
+disponível e estima o tempo total de entrega numa rede de ``--bandwidth-mbps``;
+``middleware`` compara a pilha completa com o perfil enxuto da API
+(``LEAN_API_PATHS``) nas mesmas requisições, com e sem cookies de navegador.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import platform
+import threading
+import time
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+import django
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from todos import compression
+from todos.models import Task
+from todos.renderers import FastJSONRenderer, orjson
+from todos.serializers import TaskSerializer
+from todos.seeding import DEFAULT_PASSWORD, bulk_seed
+
+HOST = "testserver"
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class _ClientTransport:
+    name = "client"
+
+    def __init__(self, counter):
+        self.client = Client()
+        self.counter = counter
+
+    def request(self, method, path, data=None, token=None):
+        extra = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        body = json.dumps(data) if data is not None else None
+        with connection.execute_wrapper(self.counter):
+            response = self.client.generic(
+                method, path, body or "", content_type="application/json", **extra
+            )
+        return response.status_code, response.content
+
+    def close(self):
+        pass
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _WSGITransport:
+    name = "wsgi"
+
+    def __init__(self, counter):
+        app = WSGIHandler()
+
+        def counted_app(environ, start_response):
+            with connection.execute_wrapper(counter):
+                return app(environ, start_response)
+
+        self.server = make_server("127.0.0.1", 0, counted_app, handler_class=_QuietHandler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Host": HOST, "Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = json.dumps(data) if data is not None else None
+        conn = http.client.HTTPConnection("127.0.0.1", self.port)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = "Mede latência, vazão e consultas SQL das rotas de tarefas e autenticação"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--tasks", type=int, default=200, help="Tarefas por usuário.")
+        parser.add_argument("--checklist", type=int, default=3, help="Itens de checklist por tarefa.")
+        parser.add_argument("--tags", type=int, default=2, help="Tags por tarefa.")
+        parser.add_argument("--iterations", type=int, default=50, help="Requisições medidas por cenário.")
+        parser.add_argument("--auth-iterations", type=int, default=10,
+                            help="Requisições medidas para login (hash de senha é caro).")
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--transport", choices=["client", "wsgi", "both"], default="both")
+        parser.add_argument("--suite", choices=["api", "render", "compression", "middleware"], default="api")
+        parser.add_argument("--bandwidth-mbps", type=float, default=2.0,
+                            help="Banda usada para estimar a entrega na suíte compression.")
+        parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout).")
+
+    def handle(self, *args, **opts):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = self._run(opts)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Resultado salvo em {opts['output']}"))
+        else:
+            self.stdout.write(payload)
+
+    def _run(self, opts):
+        users = bulk_seed(
+            users=opts["users"],
+            tasks_per_user=opts["tasks"],
+            checklist_per_task=opts["checklist"],
+            tags_per_task=opts["tags"],
+        )
+        user = users[0]
+        task_ids = list(
+            Task.objects.filter(owner=user).order_by("id").values_list("id", flat=True)
+        )
+
+        if opts["suite"] == "render":
+            results = self._run_render(user, opts)
+        elif opts["suite"] == "compression":
+            results = self._run_compression(user, opts)
+        elif opts["suite"] == "middleware":
+            results = self._run_middleware(user, opts)
+        else:
+            results = self._run_api(user, task_ids, opts)
+
+        return {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "suite": opts["suite"],
+                "dataset": {
+                    "users": opts["users"],
+                    "tasks_per_user": opts["tasks"],
+                    "checklist_per_task": opts["checklist"],
+                    "tags_per_task": opts["tags"],
+                },
+                "iterations": opts["iterations"],
+            },
+            "results": results,
+        }
+
+    def _run_api(self, user, task_ids, opts):
+        transports = ["client", "wsgi"] if opts["transport"] == "both" else [opts["transport"]]
+        results = {}
+        for name in transports:
+            counter = _QueryCounter()
+            transport = _ClientTransport(counter) if name == "client" else _WSGITransport(counter)
+            try:
+                results[name] = self._run_scenarios(transport, counter, user, task_ids, opts)
+            finally:
+                transport.close()
+        return results
+
+    @staticmethod
+    def _task_list(user):
+        tasks = list(Task.objects.filter(owner=user).order_by("id"))
+        prefetch_related_objects(tasks, "checklist_items")
+        return tasks, TaskSerializer(tasks, many=True).data
+
+    def _run_render(self, user, opts):
+        tasks, data = self._task_list(user)
+        renderers = {"drf": JSONRenderer(), "fast": FastJSONRenderer()}
+        outputs = {name: renderer.render(data) for name, renderer in renderers.items()}
+
+        results = {
+            "orjson": orjson.__version__ if orjson else None,
+            "tasks": len(tasks),
+            "bytes": len(outputs["drf"]),
+            "identical": outputs["drf"] == outputs["fast"],
+        }
+        for name, renderer in renderers.items():
+            self.stderr.write(f"[render] {name} x{opts['iterations']}")
+            for _ in range(opts["warmup"]):
+                renderer.render(data)
+            timings = []
+            for _ in range(opts["iterations"]):
+                t0 = time.perf_counter()
+                renderer.render(data)
+                timings.append(time.perf_counter() - t0)
+            timings.sort()
+            mean = sum(timings) / len(timings)
+            results[name] = {
+                "p50_ms": round(_percentile(timings, 50) * 1000, 3),
+                "p95_ms": round(_percentile(timings, 95) * 1000, 3),
+                "mb_per_s": round(len(outputs[name]) / mean / 1e6, 2) if mean else None,
+            }
+        if results["fast"]["p50_ms"]:
+            results["speedup"] = round(results["drf"]["p50_ms"] / results["fast"]["p50_ms"], 2)
+        return results
+
+    def _run_compression(self, user, opts):
+        tasks, data = self._task_list(user)
+        body = FastJSONRenderer().render(data)
+        bytes_per_ms = opts["bandwidth_mbps"] * 1e6 / 8 / 1000
+        results = {
+            "tasks": len(tasks),
+            "bytes": len(body),
+            "bandwidth_mbps": opts["bandwidth_mbps"],
+            "identity": {"transfer_ms": round(len(body) / bytes_per_ms, 3)},
+        }
+        levels = {"gzip": (1, 6, 9), "br": (1, 4, 9), "zstd": (1, 3, 9)}
+        for name in compression.CODECS:
+            for level in levels[name]:
+                key = f"{name}-{level}"
+                self.stderr.write(f"[compression] {key} x{opts['iterations']}")
+                for _ in range(opts["warmup"]):
+                    compression.compress(name, level, body)
+                timings = []
+                for _ in range(opts["iterations"]):
+                    t0 = time.perf_counter()
+                    compressed = compression.compress(name, level, body)
+                    timings.append(time.perf_counter() - t0)
+                timings.sort()
+                cpu_ms = _percentile(timings, 50) * 1000
+                transfer_ms = len(compressed) / bytes_per_ms
+                results[key] = {
+                    "bytes": len(compressed),
+                    "ratio": round(len(body) / len(compressed), 2),
+                    "cpu_p50_ms": round(cpu_ms, 3),
+                    "transfer_ms": round(transfer_ms, 3),
+                    "total_ms": round(cpu_ms + transfer_ms, 3),
+                }
+        return results
+
+    def _run_middleware(self, user, opts):
+        token = str(RefreshToken.for_user(user).access_token)
+        # Cookies que um navegador logado no admin mandaria junto para a API.
+        cookies = {"sessionid": "x" * 32, "csrftoken": "y" * 32}
+        scenarios = [
+            ("health", ("GET", "/api/health/", None, None), {}),
+            ("auth.me", ("GET", "/api/auth/me/", None, token), {}),
+            ("auth.me+cookies", ("GET", "/api/auth/me/", None, token), cookies),
+        ]
+        results = {}
+        for name, args, scenario_cookies in scenarios:
+            results[name] = {}
+            for profile, enabled in (("full", False), ("lean", True)):
+                self.stderr.write(f"[middleware] {name} {profile} x{opts['iterations']}")
+                counter = _QueryCounter()
+                # O ClientHandler monta a pilha na primeira requisição: aquecer dentro do override.
+                with override_settings(LEAN_API_ENABLED=enabled):
+                    transport = _ClientTransport(counter)
+                    transport.client.cookies.load(scenario_cookies)
+                    for _ in range(max(opts["warmup"], 1)):
+                        transport.request(*args)
+                results[name][profile] = self._measure(transport, counter, lambda: args, opts["iterations"])
+            full, lean = results[name]["full"]["p50_ms"], results[name]["lean"]["p50_ms"]
+            results[name]["saved_p50_us"] = round((full - lean) * 1000, 1)
+        return results
+
+    def _run_scenarios(self, transport, counter, user, task_ids, opts):
+        login = {"username": user.username, "password": DEFAULT_PASSWORD}
+        status, body = transport.request("POST", "/api/auth/token/", login)
+        if status != 200:
+            raise RuntimeError(f"Login falhou ({status}): {body[:200]!r}")
+        tokens = json.loads(body)
+        access, refresh = tokens["access"], tokens["refresh"]
+
+        ids = iter(task_ids * (opts["iterations"] + opts["warmup"] + 1))
+        task_payload = {
+            "title": "Tarefa de benchmark",
+            "description": "Criada pelo benchmark.",
+            "importance": "alta",
+            "category": "trabalho",
+            "tags": ["Trabalho"],
+            "checklist_items": [{"label": "Primeiro passo"}, {"label": "Segundo passo"}],
+        }
+
+        scenarios = [
+            ("tasks.list", opts["iterations"], lambda: ("GET", "/api/tasks/", None, access)),
+            ("tasks.retrieve", opts["iterations"],
+             lambda: ("GET", f"/api/tasks/{next(ids)}/", None, access)),
+            ("tasks.create", opts["iterations"], lambda: ("POST", "/api/tasks/", task_payload, access)),
+            ("tasks.update", opts["iterations"],
+             lambda: ("PUT", f"/api/tasks/{task_ids[0]}/", task_payload, access)),
+            ("tasks.toggle", opts["iterations"],
+             lambda: ("POST", f"/api/tasks/{task_ids[0]}/toggle/", None, access)),
+            ("auth.login", opts["auth_iterations"], lambda: ("POST", "/api/auth/token/", login, None)),
+            ("auth.refresh", opts["iterations"],
+             lambda: ("POST", "/api/auth/token/refresh/", {"refresh": refresh}, None)),
+        ]
+
+        results = {}
+        for name, iterations, build in scenarios:
+            self.stderr.write(f"[{transport.name}] {name} x{iterations}")
+            for _ in range(opts["warmup"]):
+                transport.request(*build())
+            results[name] = self._measure(transport, counter, build, iterations)
+        return results
+
+    @staticmethod
+    def _measure(transport, counter, build, iterations):
+        latencies = []
+        queries = []
+        statuses = {}
+        started = time.perf_counter()
+        for _ in range(iterations):
+            args = build()
+            counter.count = 0
+            t0 = time.perf_counter()
+            status, _ = transport.request(*args)
+            latencies.append(time.perf_counter() - t0)
+            queries.append(counter.count)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "requests": iterations,
+            "statuses": statuses,
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+            "req_per_s": round(iterations / elapsed, 2) if elapsed else None,
+            "queries_mean": round(sum(queries) / len(queries), 2) if queries else 0,
+            "queries_max": max(queries, default=0),
+        }
@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router
+from django.db.models import Q
+
+from todos import shards
+from todos.accounts import delete_account, optimize_storage
+
+
+class Command(BaseCommand):
+    help = "Exclui uma conta e todos os seus dados em lotes (sem o cascade do ORM)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="Username ou e-mail da conta.")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Linhas por lote (padrão: ACCOUNT_DELETE_BATCH_SIZE).")
+        parser.add_argument("--pause", type=float, default=0.0, help="Segundos de pausa entre lotes.")
+        parser.add_argument("--vacuum", action="store_true",
+                            help="Ao final, VACUUM/otimização para devolver o espaço ao disco.")
+
+    def handle(self, *args, **opts):
+        user = User.objects.filter(Q(username__iexact=opts["user"]) | Q(email__iexact=opts["user"])).first()
+        if user is None:
+            raise CommandError(f"Usuário '{opts['user']}' não encontrado.")
+
+        batch_size = opts["batch_size"] or settings.ACCOUNT_DELETE_BATCH_SIZE
+        databases = [router.db_for_write(User)]
+        shard = shards.shard_for(user.pk, create=False)
+        if shard and shard not in databases:
+            databases.append(shard)
+        started = time.perf_counter()
+        totals = delete_account(
+            user,
+            batch_size=batch_size,
+            pause=opts["pause"],
+            progress=lambda name, deleted: self.stdout.write(f"  {name}: {deleted}"),
+        )
+        batches = totals.pop("batches")
+        summary = ", ".join(f"{count} {name}" for name, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Conta '{user.username}' excluída: {summary} "
+            f"({batches} lotes, {time.perf_counter() - started:.1f}s)."
+        ))
+
+        if opts["vacuum"]:
+            for alias in databases:
+                started = time.perf_counter()
+                done = optimize_storage(alias)
+                if done:
+                    self.stdout.write(f"{alias}: {done} ({time.perf_counter() - started:.1f}s).")
+                else:
+                    self.stdout.write(f"{alias}: banco sem VACUUM suportado; etapa ignorada.")
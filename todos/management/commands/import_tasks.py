@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from todos.importer import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, detect_format, import_tasks
+from todos.shards import owner_scope
+
+
+class Command(BaseCommand):
+    help = "Importa tarefas de um arquivo NDJSON ou CSV para um usuário"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Arquivo .ndjson/.jsonl ou .csv")
+        parser.add_argument("--user", required=True, help="Usuário ou e-mail dono das tarefas.")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Força o formato do arquivo.")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **opts):
+        identifier = opts["user"].strip()
+        lookup = {"email__iexact": identifier} if "@" in identifier else {"username__iexact": identifier}
+        try:
+            owner = User.objects.get(**lookup)
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário '{identifier}' não encontrado.")
+
+        fmt = opts["format"] or detect_format(opts["path"], None)
+        if fmt is None:
+            raise CommandError("Não foi possível detectar o formato; use --format.")
+
+        with open(opts["path"], "rb") as fh, owner_scope(owner.pk):
+            report = import_tasks(owner, fh, fmt, chunk_size=opts["chunk_size"])
+
+        for error in report["errors"]:
+            self.stderr.write(f"linha {error['line']}: {error['errors']}")
+        if report["errors_truncated"]:
+            self.stderr.write("... (demais erros omitidos)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} tarefas importadas, {report['failed']} linhas com erro."
+        ))
@@ -0,0 +1,81 @@
+"""Resume os perfis gravados pelo ``ProfilingMiddleware`` (todos/profiling.py)."""
+from __future__ import annotations
+
+import io
+import pstats
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from todos.profiling import load_meta, read_stacks
+
+
+class Command(BaseCommand):
+    help = "Lista as funções mais caras somando os perfis capturados"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=None, help="Diretório dos perfis (padrão: PROFILING_DIR).")
+        parser.add_argument("--route", help="Só perfis desta rota (ex.: task-list).")
+        parser.add_argument("--top", type=int, default=25)
+        parser.add_argument("--sort", choices=["cumulative", "tottime", "ncalls"], default="cumulative",
+                            help="Ordenação dos perfis cProfile.")
+
+    def handle(self, *args, **opts):
+        directory = Path(opts["dir"] or settings.PROFILING_DIR)
+        if not directory.is_dir():
+            raise CommandError(f"Diretório {directory} não existe.")
+        profiles = [
+            meta for meta in load_meta(directory)
+            if not opts["route"] or meta.get("route") == opts["route"]
+        ]
+        if not profiles:
+            self.stdout.write("Nenhum perfil encontrado.")
+            return
+
+        self._routes(profiles)
+        cprofiles = [directory / meta["file"] for meta in profiles if meta.get("mode") == "cprofile"]
+        samples = [directory / meta["file"] for meta in profiles if meta.get("mode") == "sample"]
+        if cprofiles:
+            self._cprofile(cprofiles, opts)
+        if samples:
+            self._samples(samples, opts)
+
+    def _routes(self, profiles):
+        by_route = defaultdict(list)
+        for meta in profiles:
+            by_route[(meta["route"], meta["method"])].append(meta)
+        self.stdout.write(f"{len(profiles)} perfis\n")
+        self.stdout.write(f"{'rota':<28} {'n':>4} {'média ms':>10} {'máx ms':>10} {'tarefas (média)':>16}")
+        for (route, method), metas in sorted(by_route.items(), key=lambda item: -len(item[1])):
+            durations = [meta["duration_ms"] for meta in metas]
+            tasks = [meta["dataset"]["tasks"] for meta in metas if meta.get("dataset")]
+            mean_tasks = f"{sum(tasks) / len(tasks):.0f}" if tasks else "-"
+            self.stdout.write(
+                f"{method + ' ' + route:<28} {len(metas):>4} {sum(durations) / len(durations):>10.1f} "
+                f"{max(durations):>10.1f} {mean_tasks:>16}"
+            )
+
+    def _cprofile(self, paths, opts):
+        out = io.StringIO()
+        stats = pstats.Stats(*(str(path) for path in paths), stream=out)
+        stats.strip_dirs().sort_stats(opts["sort"]).print_stats(opts["top"])
+        self.stdout.write(f"\n== cProfile ({len(paths)} perfis, por {opts['sort']}) ==")
+        self.stdout.write(out.getvalue().strip())
+
+    def _samples(self, paths, opts):
+        inclusive = Counter()
+        own = Counter()
+        total = 0
+        for path in paths:
+            for stack, count in read_stacks(path).items():
+                frames = stack.split(";")
+                total += count
+                own[frames[-1]] += count
+                for frame in set(frames):
+                    inclusive[frame] += count
+        self.stdout.write(f"\n== Amostrador ({len(paths)} perfis, {total} amostras) ==")
+        self.stdout.write(f"{'incl. %':>8} {'próprio %':>10}  função")
+        for frame, count in inclusive.most_common(opts["top"]):
+            self.stdout.write(f"{100 * count / total:>8.1f} {100 * own[frame] / total:>10.1f}  {frame}")
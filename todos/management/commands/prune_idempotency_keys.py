@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from todos import shards
+from todos.idempotency import reclaimable
+from todos.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Remove chaves de idempotência expiradas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=None,
+                            help="Horas mantidas (padrão: IDEMPOTENCY_TTL_HOURS).")
+
+    def handle(self, *args, **opts):
+        hours = opts["hours"] if opts["hours"] is not None else settings.IDEMPOTENCY_TTL_HOURS
+        cutoff = timezone.now() - timedelta(hours=hours)
+        deleted = sum(
+            IdempotencyKey.objects.using(alias).filter(Q(created_at__lt=cutoff) | reclaimable()).delete()[0]
+            for alias in shards.databases()
+        )
+        self.stdout.write(self.style.SUCCESS(f"{deleted} chaves removidas (anteriores a {hours} horas)."))
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from todos.models import TaskEvent
+
+
+class Command(BaseCommand):
+    help = "Remove eventos de tarefas (SSE) mais antigos que a janela de retomada"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Dias mantidos (padrão: TASK_EVENTS_RETENTION_DAYS).")
+
+    def handle(self, *args, **opts):
+        days = opts["days"] if opts["days"] is not None else settings.TASK_EVENTS_RETENTION_DAYS
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = TaskEvent.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} eventos removidos (anteriores a {days} dias)."))
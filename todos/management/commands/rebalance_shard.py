@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.db.models import Q
+
+from todos import shards
+
+
+class Command(BaseCommand):
+    help = "Move as tarefas (e demais tabelas por dono) de um usuário para outro shard"
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", nargs="?", help="Username ou e-mail da conta.")
+        parser.add_argument("--to", help="Shard de destino (padrão: o com menos usuários).")
+        parser.add_argument("--unassigned", action="store_true",
+                            help="Move do default para o shard do hash todos os usuários ainda sem shard "
+                                 "(ao ligar os shards numa base existente).")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Linhas por leitura/escrita.")
+        parser.add_argument("--grace", type=float, default=1.0,
+                            help="Segundos de espera pelas requisições em andamento antes de copiar.")
+
+    def handle(self, *args, **opts):
+        if not shards.enabled():
+            raise CommandError("Shards desligados: defina DATABASE_SHARD_PATHS.")
+        if opts["to"] and opts["to"] not in settings.DATABASE_SHARDS:
+            raise CommandError(f"Shard '{opts['to']}' desconhecido; use um de {settings.DATABASE_SHARDS}.")
+
+        if opts["unassigned"]:
+            owners = User.objects.filter(shard__isnull=True).order_by("id").values_list("id", flat=True)
+            moved = 0
+            for owner_id in list(owners):
+                self._move(owner_id, shards.hash_shard(owner_id), opts)
+                moved += 1
+            self.stdout.write(self.style.SUCCESS(f"{moved} usuários movidos do default."))
+            return
+
+        if not opts["user"]:
+            raise CommandError("Informe o usuário ou --unassigned.")
+        user = User.objects.filter(Q(username__iexact=opts["user"]) | Q(email__iexact=opts["user"])).first()
+        if user is None:
+            raise CommandError(f"Usuário '{opts['user']}' não encontrado.")
+        self._move(user.pk, opts["to"] or shards.least_loaded(), opts)
+
+    def _move(self, owner_id, target, opts):
+        started = time.perf_counter()
+        try:
+            copied = shards.move_owner(
+                owner_id,
+                target,
+                batch_size=opts["batch_size"],
+                grace=opts["grace"],
+                progress=lambda name, count: self.stdout.write(f"  {name}: {count}"),
+            )
+        except IntegrityError as exc:
+            raise CommandError(f"Cópia do usuário {owner_id} para {target} desfeita: {exc}")
+        if not copied:
+            self.stdout.write(f"Usuário {owner_id} já está em {target}.")
+            return
+        summary = ", ".join(f"{count} {name}" for name, count in copied.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Usuário {owner_id} -> {target}: {summary} ({time.perf_counter() - started:.1f}s)."
+        ))
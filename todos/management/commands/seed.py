@@ -1,17 +1,55 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from todos.models import Task
+from todos.seeding import DEFAULT_PASSWORD, bulk_seed
+from todos.shards import owner_scope
 
 class Command(BaseCommand):
     help = "Popula dados de exemplo"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=0, help="Gera N usuários em massa (bench_<n>).")
+        parser.add_argument("--tasks", type=int, default=10, help="Tarefas por usuário gerado.")
+        parser.add_argument("--checklist", type=int, default=None,
+                            help="Itens de checklist por tarefa (padrão: distribuição realista).")
+        parser.add_argument("--tags", type=int, default=None,
+                            help="Tags por tarefa (padrão: distribuição realista).")
+        parser.add_argument("--prefix", default="bench", help="Prefixo dos usuários gerados.")
+        parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Senha comum (hash calculado uma vez).")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Linhas por bulk_create/transação.")
+        parser.add_argument("--days", type=int, default=365, help="Janela de histórico de created_at.")
+        parser.add_argument("--random-seed", type=int, default=42)
+
     def handle(self, *args, **kwargs):
+        if kwargs["users"]:
+            started = time.perf_counter()
+            users = bulk_seed(
+                users=kwargs["users"],
+                tasks_per_user=kwargs["tasks"],
+                checklist_per_task=kwargs["checklist"],
+                tags_per_task=kwargs["tags"],
+                prefix=kwargs["prefix"],
+                password=kwargs["password"],
+                chunk_size=kwargs["chunk_size"],
+                history_days=kwargs["days"],
+                seed=kwargs["random_seed"],
+                progress=lambda done, total: self.stdout.write(f"  {done}/{total} tarefas"),
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(users)} usuários e {len(users) * kwargs['tasks']} tarefas criados "
+                f"em {time.perf_counter() - started:.1f}s (senha: {kwargs['password']})."
+            ))
+            return
+
         user, _ = User.objects.get_or_create(username="demo", defaults={"email": "demo@datacake.local"})
         if not user.email:
             user.email = "demo@datacake.local"
         user.set_password("Demo@123!")
         user.save()
 
-        Task.objects.get_or_create(owner=user, title="Estudar Django", status="pendente")
-        Task.objects.get_or_create(owner=user, title="Finalizar UI React", status="concluida")
+        with owner_scope(user.pk):
+            Task.objects.get_or_create(owner=user, title="Estudar Django", status="pendente")
+            Task.objects.get_or_create(owner=user, title="Finalizar UI React", status="concluida")
         self.stdout.write(self.style.SUCCESS("Seeds criados. Usuário: demo / senha: 123456"))
@@ -0,0 +1,111 @@
+"""
+Relatório de tempo de partida: roda um interpretador novo com
+``python -X importtime``, carrega ``server.wsgi`` (como o gunicorn) e o
+aquecimento de ``todos.warmup``, e lista os módulos mais caros de importar.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+CHILD = (
+    "import json, time\n"
+    "t0 = time.perf_counter()\n"
+    "import server.wsgi\n"
+    "wsgi_ms = (time.perf_counter() - t0) * 1000\n"
+    "from todos.warmup import warmup\n"
+    "steps = warmup(connect={connect})\n"
+    "print(json.dumps({{'wsgi_ms': wsgi_ms, 'warmup': steps}}))\n"
+)
+
+
+def parse_importtime(lines):
+    """Linhas ``import time: self | cumulative | módulo`` -> lista de dicts (µs)."""
+    modules = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # cabeçalho
+        name = parts[2].rstrip()
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+    return modules
+
+
+class Command(BaseCommand):
+    help = "Mostra o tempo de import por módulo e das etapas de aquecimento na partida"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=25, help="Quantos módulos listar.")
+        parser.add_argument("--sort", choices=["cumulative", "self"], default="cumulative")
+        parser.add_argument("--by-package", action="store_true",
+                            help="Agrupa o tempo próprio pelo pacote de topo (django, rest_framework...).")
+        parser.add_argument("--no-connect", action="store_true",
+                            help="Não abre banco/cache no aquecimento (como no master do gunicorn).")
+        parser.add_argument("--json", action="store_true", help="Saída em JSON.")
+
+    def handle(self, *args, **opts):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "server.settings")}
+        code = CHILD.format(connect=not opts["no_connect"])
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        total_ms = (time.perf_counter() - started) * 1000
+        if proc.returncode != 0:
+            raise CommandError(f"Processo de medição falhou:\n{proc.stderr[-2000:]}")
+
+        child = json.loads(proc.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(proc.stderr.splitlines())
+        if opts["by_package"]:
+            packages = {}
+            for module in modules:
+                package = module["module"].split(".")[0]
+                packages[package] = packages.get(package, 0) + module["self_us"]
+            ranking = [
+                {"module": name, "self_us": us, "cumulative_us": us}
+                for name, us in packages.items()
+            ]
+        else:
+            ranking = modules
+        key = "self_us" if opts["by_package"] else f"{opts['sort']}_us"
+        ranking = sorted(ranking, key=lambda m: m[key], reverse=True)[: opts["top"]]
+
+        report = {
+            "process_ms": round(total_ms, 1),
+            "wsgi_import_ms": round(child["wsgi_ms"], 1),
+            "imports_self_ms": round(sum(m["self_us"] for m in modules) / 1000, 1),
+            "modules_imported": len(modules),
+            "warmup_ms": child["warmup"],
+            "top": ranking,
+        }
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+            return
+
+        self.stdout.write(
+            f"Processo: {report['process_ms']} ms | import server.wsgi: {report['wsgi_import_ms']} ms | "
+            f"{report['modules_imported']} módulos ({report['imports_self_ms']} ms de import)"
+        )
+        self.stdout.write("Aquecimento: " + ", ".join(f"{k}={v} ms" for k, v in child["warmup"].items()))
+        self.stdout.write(f"{'cumulativo ms':>14} {'próprio ms':>11}  módulo")
+        for module in ranking:
+            self.stdout.write(
+                f"{module['cumulative_us'] / 1000:>14.1f} {module['self_us'] / 1000:>11.1f}  {module['module']}"
+            )
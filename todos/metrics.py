@@ -0,0 +1,262 @@
+"""
+Registro de métricas em processo, exposto no formato texto do Prometheus.
+
+Cada processo mantém contadores, gauges e histogramas em memória. Quando
+``METRICS_MULTIPROC_DIR`` está configurado (ex.: vários workers do gunicorn),
+cada worker grava periodicamente um snapshot em ``metrics-<pid>.json`` nesse
+diretório e a rota de coleta soma os snapshots de todos os workers.
+"""
+from __future__ import annotations
+
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Qualquer outro método vira "other": o cliente não cria séries à vontade.
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"})
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(labels), self._copy(value)] for labels, value in self._values.items()]
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Gauge somado entre workers vivos (ex.: requisições em andamento)."""
+
+    kind = "gauge"
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: tuple = ()) -> None:
+        with self._lock:
+            self._values[labels] = float(value)
+
+
+class Histogram(_Metric):
+    """Histograma de buckets fixos; guarda contagens não cumulativas + soma."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def _copy(self, value):
+        return [list(value[0]), value[1]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    # --- snapshots / multiprocesso ---
+
+    def snapshot(self) -> dict:
+        return {"pid": os.getpid(), "metrics": {name: m.snapshot() for name, m in self._metrics.items()}}
+
+    def _multiproc_dir(self) -> str:
+        return getattr(settings, "METRICS_MULTIPROC_DIR", "")
+
+    def maybe_flush(self) -> None:
+        """Grava o snapshot do worker se o intervalo configurado já passou."""
+        directory = self._multiproc_dir()
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < getattr(settings, "METRICS_FLUSH_SECONDS", 1.0):
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = now
+            self._write_snapshot(directory)
+        finally:
+            self._flush_lock.release()
+
+    def _write_snapshot(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp_path, path)
+
+    def collect(self) -> list[dict]:
+        """Snapshots de todos os processos (ou só do atual, sem diretório compartilhado)."""
+        directory = self._multiproc_dir()
+        if not directory:
+            return [self.snapshot()]
+
+        self._write_snapshot(directory)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    snapshots.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    # --- exposição ---
+
+    def render(self) -> str:
+        snapshots = self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            merged = self._merge(metric, snapshots)
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels in sorted(merged):
+                value = merged[labels]
+                if metric.kind != "histogram":
+                    lines.append(
+                        f"{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}"
+                    )
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = (("le", _format_value(bound)),)
+                    lines.append(
+                        f"{name}_bucket{_format_labels(metric.labelnames, labels, le)} {cumulative}"
+                    )
+                label_str = _format_labels(metric.labelnames, labels)
+                lines.append(f"{name}_sum{label_str} {_format_value(total)}")
+                lines.append(f"{name}_count{label_str} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _merge(metric: _Metric, snapshots: list[dict]) -> dict:
+        merged: dict[tuple, object] = {}
+        for snap in snapshots:
+            pid = snap.get("pid")
+            # Gauges de workers que já morreram não fazem mais sentido.
+            if metric.kind == "gauge" and pid != os.getpid() and not _pid_alive(pid):
+                continue
+            for labels, value in snap.get("metrics", {}).get(metric.name, []):
+                key = tuple(labels)
+                if metric.kind == "histogram":
+                    current = merged.get(key)
+                    if current is None:
+                        merged[key] = [list(value[0]), value[1]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                else:
+                    merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+
+def _pid_alive(pid) -> bool:
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = Registry()
+
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total",
+    "Total de requisições HTTP por rota, método e status.",
+    ("route", "method", "status"),
+)
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP em segundos.",
+    ("route", "method", "status"),
+)
+REQUESTS_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress",
+    "Requisições HTTP em andamento.",
+)
+
+
+def observe_request(route: str, method: str, status: int, duration: float) -> None:
+    labels = (route, method if method in HTTP_METHODS else "other", str(status))
+    REQUESTS_TOTAL.inc(labels)
+    REQUEST_DURATION.observe(duration, labels)
+    registry.maybe_flush()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import logging
+import os
+import random
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware import csrf
+from django.utils.cache import patch_vary_headers
+
+from . import compression, metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """Registra contagem e latência de cada requisição, rotulada pelo nome da rota."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        metrics.REQUESTS_IN_PROGRESS.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.REQUESTS_IN_PROGRESS.dec()
+
+        match = getattr(request, "resolver_match", None)
+        route = (match.url_name if match else None) or "unmatched"
+        metrics.observe_request(
+            route, request.method, response.status_code, time.perf_counter() - start
+        )
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Comprime respostas conforme o ``Accept-Encoding`` (zstd/br/gzip, na ordem
+    de ``COMPRESSION_ENCODINGS``), inclusive as de streaming.
+
+    Corpos menores que ``COMPRESSION_MIN_SIZE``, tipos já comprimidos,
+    ``text/event-stream`` e as rotas de ``COMPRESSION_EXCLUDE_PATHS``
+    passam direto.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "COMPRESSION_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.levels = settings.COMPRESSION_LEVELS
+        self.preference = [name for name in settings.COMPRESSION_ENCODINGS if name in compression.CODECS]
+        self.content_types = tuple(settings.COMPRESSION_CONTENT_TYPES)
+        self.exclude_paths = tuple(settings.COMPRESSION_EXCLUDE_PATHS)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._compressible(request, response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), self.preference
+        )
+        if encoding is None:
+            return response
+        level = self.levels[encoding]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_chunks(
+                    encoding, level, response.streaming_content
+                )
+            else:
+                response.streaming_content = compression.compress_chunks(
+                    encoding, level, response.streaming_content
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed = compression.compress(encoding, level, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # O corpo mudou: um ETag forte deixaria de valer byte a byte.
+        etag = response.get("ETag")
+        if etag and etag.lstrip().startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def _compressible(self, request, response):
+        if response.has_header("Content-Encoding") or response.status_code in (204, 206, 304):
+            return False
+        if not response.streaming and len(response.content) < self.min_size:
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        if request.path.startswith(self.exclude_paths):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        # SSE: eventos precisam chegar um a um; o proxy não deve segurar nada.
+        if content_type == "text/event-stream":
+            return False
+        return content_type.startswith(self.content_types)
+
+
+class ProfilingMiddleware:
+    """
+    Perfila requisições de ``PROFILING_PATHS`` quando um staff envia o
+    cabeçalho ``PROFILING_HEADER`` ou pela amostragem de
+    ``PROFILING_SAMPLE_RATE``; os perfis vão para ``PROFILING_DIR``.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.directory = Path(settings.PROFILING_DIR)
+        self.paths = tuple(settings.PROFILING_PATHS)
+        self.header = settings.PROFILING_HEADER
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.default_mode = settings.PROFILING_MODE
+
+    def __call__(self, request):
+        mode, trigger = self._select(request)
+        if mode is None:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with profiling.RequestProfiler(mode) as profiler:
+            response = self.get_response(request)
+        duration_ms = profiling.elapsed_ms(started)
+
+        match = getattr(request, "resolver_match", None)
+        user = getattr(request, "user", None)
+        meta = {
+            "route": (match.url_name if match else None) or "unmatched",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": duration_ms,
+            "trigger": trigger,
+            "user_id": user.pk if user is not None and user.is_authenticated else None,
+            "dataset": profiling.dataset_size(user),
+            "pid": os.getpid(),
+        }
+        try:
+            profiler.save(self.directory, meta)
+        except OSError:
+            logger.exception("Could not write profile for %s", request.path)
+        return response
+
+    def _select(self, request):
+        if not request.path.startswith(self.paths):
+            return None, None
+        requested = request.headers.get(self.header)
+        if requested and self._is_staff(request):
+            return (requested if requested in profiling.MODES else self.default_mode), "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return self.default_mode, "sample_rate"
+        return None, None
+
+    @staticmethod
+    def _is_staff(request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+        # A API autentica por JWT dentro da view; aqui validamos o token à parte.
+        from rest_framework.exceptions import APIException
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except APIException:
+            return False
+        return bool(result and result[0].is_staff)
+
+
+def _skip_on_lean_paths(base):
+    """
+    Subclasse de ``base`` que não roda nas rotas de ``LEAN_API_PATHS``: a API
+    autentica só por JWT no DRF e não usa sessão, CSRF, ``request.user`` do
+    Django nem mensagens. Continua sendo subclasse para os checks do admin.
+    """
+
+    class LeanMiddleware(base):
+        def __init__(self, get_response):
+            super().__init__(get_response)
+            self.lean_paths = tuple(settings.LEAN_API_PATHS) if settings.LEAN_API_ENABLED else ()
+
+        def __call__(self, request):
+            if request.path.startswith(self.lean_paths):
+                return self.get_response(request)
+            return super().__call__(request)
+
+    if hasattr(base, "process_view"):
+        def process_view(self, request, view_func, view_args, view_kwargs):
+            if request.path.startswith(self.lean_paths):
+                return None
+            return base.process_view(self, request, view_func, view_args, view_kwargs)
+
+        LeanMiddleware.process_view = process_view
+
+    LeanMiddleware.__name__ = LeanMiddleware.__qualname__ = base.__name__
+    LeanMiddleware.__module__ = __name__
+    return LeanMiddleware
+
+
+SessionMiddleware = _skip_on_lean_paths(sessions_middleware.SessionMiddleware)
+CsrfViewMiddleware = _skip_on_lean_paths(csrf.CsrfViewMiddleware)
+AuthenticationMiddleware = _skip_on_lean_paths(auth_middleware.AuthenticationMiddleware)
+MessageMiddleware = _skip_on_lean_paths(messages_middleware.MessageMiddleware)
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-19 04:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0007_taskevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=120)),
+                ('description', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('concluida', 'Concluída')], default='concluida', max_length=10)),
+                ('importance', models.CharField(choices=[('baixa', 'Baixa'), ('media', 'Média'), ('alta', 'Alta')], default='media', max_length=8)),
+                ('category', models.CharField(choices=[('trabalho', 'Trabalho'), ('estudos', 'Estudos'), ('casa', 'Casa'), ('saude', 'Saúde'), ('pessoal', 'Pessoal')], default='pessoal', max_length=12)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('recurrence', models.CharField(choices=[('nenhuma', 'Nenhuma'), ('diaria', 'Diária'), ('semanal', 'Semanal'), ('mensal', 'Mensal')], default='nenhuma', max_length=8)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTaskChecklistItem',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('label', models.CharField(max_length=150)),
+                ('done', models.BooleanField(default=False)),
+                ('order', models.PositiveIntegerField(default=0)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checklist_items', to='todos.archivedtask')),
+            ],
+            options={
+                'ordering': ['order', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['owner', '-created_at'], name='archivedtask_owner_created'),
+        ),
+    ]
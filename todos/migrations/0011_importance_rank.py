@@ -0,0 +1,49 @@
+# Generated by Django 5.1.1 on 2026-10-19 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+RANKS = {"baixa": 0, "media": 1, "alta": 2}
+
+
+def fill_importance_rank(apps, schema_editor):
+    # Um UPDATE por valor (o padrão 1 já cobre "media").
+    for model_name in ("Task", "ArchivedTask"):
+        model = apps.get_model("todos", model_name)
+        for importance, rank in RANKS.items():
+            if rank != 1:
+                model.objects.filter(importance=importance).update(importance_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0010_task_owner_due_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='importance_rank',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='importance_rank',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(fill_importance_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'created_at'], name='task_owner_created'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'importance_rank', 'id'], name='task_owner_importance'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'status', 'id'], name='task_owner_status'),
+        ),
+    ]
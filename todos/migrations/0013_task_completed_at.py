@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-19 05:03
+
+from django.db import migrations, models
+
+
+def fill_completed_at(apps, schema_editor):
+    # Melhor estimativa para as já concluídas: a última alteração.
+    for model_name in ("Task", "ArchivedTask"):
+        model = apps.get_model("todos", model_name)
+        model.objects.filter(status="concluida").update(completed_at=models.F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0012_shardassignment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_completed_at, migrations.RunPython.noop),
+    ]
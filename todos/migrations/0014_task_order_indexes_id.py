@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-19 05:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0013_task_completed_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_owner_due_date',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_owner_created',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'due_date', 'id'], name='task_owner_due_date'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='task_owner_created'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth.models import User
 from django.utils import timezone
 import secrets
@@ -20,6 +21,8 @@ class Task(models.Model):
         ("saude", "Saúde"),
         ("pessoal", "Pessoal"),
     ]
+    # Ordem numérica da importância (``ordering=importance`` usa o índice).
+    IMPORTANCE_RANKS = {"baixa": 0, "media": 1, "alta": 2}
     RECURRENCE_CHOICES = [
         ("nenhuma", "Nenhuma"),
         ("diaria", "Diária"),
@@ -32,16 +35,45 @@ class Task(models.Model):
     description = models.TextField(blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pendente")
     importance = models.CharField(max_length=8, choices=IMPORTANCE_CHOICES, default="media")
+    importance_rank = models.PositiveSmallIntegerField(default=1, editable=False)
     category = models.CharField(max_length=12, choices=CATEGORY_CHOICES, default="pessoal")
     tags = models.JSONField(default=list, blank=True)
     due_date = models.DateField(null=True, blank=True)
     recurrence = models.CharField(max_length=8, choices=RECURRENCE_CHOICES, default="nenhuma")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Quando passou a ``concluida`` (nulo se pendente); o arquivamento usa este
+    # horário, já que o toggle não mexe em ``updated_at``.
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        # Um índice por ordenação da lista (``ordering=``), sempre com o dono na
+        # frente e o id (desempate) no fim.
+        indexes = [
+            models.Index(fields=["owner", "due_date", "id"], name="task_owner_due_date"),
+            models.Index(fields=["owner", "created_at", "id"], name="task_owner_created"),
+            models.Index(fields=["owner", "importance_rank", "id"], name="task_owner_importance"),
+            models.Index(fields=["owner", "status", "id"], name="task_owner_status"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.importance_rank = self.IMPORTANCE_RANKS.get(self.importance, 1)
+        if self.status != "concluida":
+            self.completed_at = None
+        elif self.completed_at is None:
+            self.completed_at = timezone.now()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            extra = {"importance_rank"} if "importance" in update_fields else set()
+            if "status" in update_fields:
+                extra.add("completed_at")
+            if extra:
+                kwargs["update_fields"] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
 
 class TaskChecklistItem(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="checklist_items")
@@ -73,3 +105,94 @@ class EmailVerificationCode(models.Model):
     def generate_code():
         return f"{secrets.randbelow(900000) + 100000}"
 
+
+
+class TaskEvent(models.Model):
+    """Alterações de tarefas para o stream SSE; o id é o ``id:`` do evento (retomada)."""
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="task_events")
+    kind = models.CharField(max_length=10)
+    task_id = models.BigIntegerField(null=True)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "id"], name="taskevent_owner_id_idx")]
+
+    def __str__(self):
+        return f"{self.kind} #{self.task_id}"
+
+
+class ArchivedTask(models.Model):
+    """
+    Tarefa concluída movida pelo ``archive_tasks`` para fora de ``todos_task``.
+    Mantém o id e os horários originais; lida via ``GET /api/tasks/?archived=1``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_tasks")
+    title = models.CharField(max_length=120)
+    description = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=Task.STATUS_CHOICES, default="concluida")
+    importance = models.CharField(max_length=8, choices=Task.IMPORTANCE_CHOICES, default="media")
+    importance_rank = models.PositiveSmallIntegerField(default=1, editable=False)
+    category = models.CharField(max_length=12, choices=Task.CATEGORY_CHOICES, default="pessoal")
+    tags = models.JSONField(default=list, blank=True)
+    due_date = models.DateField(null=True, blank=True)
+    recurrence = models.CharField(max_length=8, choices=Task.RECURRENCE_CHOICES, default="nenhuma")
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "-created_at"], name="archivedtask_owner_created")]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedTaskChecklistItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name="checklist_items")
+    label = models.CharField(max_length=150)
+    done = models.BooleanField(default=False)
+    order = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["order", "id"]
+
+    def __str__(self):
+        return f"{self.label} ({'ok' if self.done else 'pendente'})"
+
+
+class IdempotencyKey(models.Model):
+    """Resposta guardada de uma escrita com ``Idempotency-Key`` (``status_code`` nulo = em andamento)."""
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "key"], name="idempotencykey_owner_key"),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class ShardAssignment(models.Model):
+    """Shard (alias de ``DATABASES``) com as tabelas por dono do usuário; fica sempre no ``default``."""
+
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="shard")
+    alias = models.CharField(max_length=40)
+    # Em mudança de shard (``rebalance_shard``): as requisições do usuário recebem 503.
+    moving = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.owner_id} -> {self.alias}"
@@ -0,0 +1,31 @@
+"""Parser JSON com ``orjson`` quando instalado (mesmas regras do ``JSONParser``)."""
+from __future__ import annotations
+
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+
+def loads(data):
+    """``json.loads`` rápido para textos/bytes UTF-8; erros são ``ValueError``."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            # orjson já rejeita NaN/Infinity, como o DRF com STRICT_JSON.
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -0,0 +1,99 @@
+"""
+Política de senha compartilhada entre cadastro e redefinição de senha.
+
+As regras vêm de ``settings.PASSWORD_POLICY`` e são lidas uma vez (o cache é
+limpo quando o setting muda, ex.: ``override_settings`` nos testes). As
+classes de caractere são checadas numa única passada pela senha.
+"""
+from __future__ import annotations
+
+import functools
+import string
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_UPPER = frozenset(string.ascii_uppercase)
+_LOWER = frozenset(string.ascii_lowercase)
+_DIGITS = frozenset(string.digits)
+
+# Ordem das mensagens = ordem em que as regras são reportadas.
+_CLASS_RULES = (
+    ("REQUIRE_UPPER", "upper", "A senha deve conter pelo menos uma letra maiúscula.", "maiúscula"),
+    ("REQUIRE_LOWER", "lower", "A senha deve conter pelo menos uma letra minúscula.", "minúscula"),
+    ("REQUIRE_DIGIT", "digit", "A senha deve conter pelo menos um número.", "número"),
+    ("REQUIRE_SYMBOL", "symbol", "A senha deve conter pelo menos um símbolo.", "símbolo"),
+)
+
+DEFAULT_POLICY = {
+    "MIN_LENGTH": 8,
+    "REQUIRE_UPPER": True,
+    "REQUIRE_LOWER": True,
+    "REQUIRE_DIGIT": True,
+    "REQUIRE_SYMBOL": True,
+}
+
+
+def _char_class(char):
+    if char in _UPPER:
+        return "upper"
+    if char in _LOWER:
+        return "lower"
+    if char in _DIGITS:
+        return "digit"
+    return "symbol"
+
+
+class PasswordPolicy:
+    def __init__(self, min_length=8, require_upper=True, require_lower=True,
+                 require_digit=True, require_symbol=True):
+        self.min_length = min_length
+        flags = {
+            "REQUIRE_UPPER": require_upper,
+            "REQUIRE_LOWER": require_lower,
+            "REQUIRE_DIGIT": require_digit,
+            "REQUIRE_SYMBOL": require_symbol,
+        }
+        self.rules = [rule for rule in _CLASS_RULES if flags[rule[0]]]
+        self.required = frozenset(kind for _, kind, _, _ in self.rules)
+        parts = [label for *_, label in self.rules]
+        summary = f"A senha deve ter {min_length}+ caracteres"
+        if parts:
+            listed = ", ".join(parts[:-1]) + (" e " if len(parts) > 1 else "") + parts[-1]
+            summary += f", com {listed}"
+        self.summary = summary + "."
+
+    def errors(self, password: str) -> list[str]:
+        """Mensagens das regras violadas, na ordem da política (vazia = senha válida)."""
+        errors = []
+        if len(password) < self.min_length:
+            errors.append(f"A senha deve ter pelo menos {self.min_length} caracteres.")
+        missing = set(self.required)
+        for char in password:
+            missing.discard(_char_class(char))
+            if not missing:
+                break
+        errors.extend(message for _, kind, message, _ in self.rules if kind in missing)
+        return errors
+
+    def is_valid(self, password: str) -> bool:
+        return not self.errors(password)
+
+
+@functools.cache
+def get_policy() -> PasswordPolicy:
+    config = {**DEFAULT_POLICY, **getattr(settings, "PASSWORD_POLICY", {})}
+    return PasswordPolicy(
+        min_length=config["MIN_LENGTH"],
+        require_upper=config["REQUIRE_UPPER"],
+        require_lower=config["REQUIRE_LOWER"],
+        require_digit=config["REQUIRE_DIGIT"],
+        require_symbol=config["REQUIRE_SYMBOL"],
+    )
+
+
+@receiver(setting_changed)
+def _reset_policy(*, setting, **kwargs):
+    if setting == "PASSWORD_POLICY":
+        get_policy.cache_clear()
@@ -0,0 +1,141 @@
+"""
+Perfis de requisições reais, sob demanda.
+
+O ``ProfilingMiddleware`` perfila uma requisição quando um usuário staff envia
+o cabeçalho ``X-Profile: 1`` (ou ``cprofile``/``sample``) ou quando ela cai na
+amostragem de ``PROFILING_SAMPLE_RATE``. Dois modos:
+
+- ``cprofile``: determinístico, grava ``<id>.prof`` (formato ``pstats``);
+- ``sample``: amostrador estatístico (pilha da thread a cada
+  ``PROFILING_SAMPLE_INTERVAL`` s), grava ``<id>.stacks`` no formato
+  "collapsed" de flamegraph (``a;b;c N``). Custa bem menos em produção.
+
+Cada perfil vem com ``<id>.json``: rota, método, status, duração, usuário e o
+volume de dados dele (tarefas e itens de checklist).
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+MODES = ("cprofile", "sample")
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread em intervalos fixos (a partir de outra thread)."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class RequestProfiler:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self._profile = None
+        self._sampler = None
+
+    def __enter__(self):
+        if self.mode == "sample":
+            self._sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._sampler:
+            self._sampler.stop()
+        else:
+            self._profile.disable()
+
+    def save(self, directory: Path, meta: dict) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+        name = f"{stamp}-{meta['route']}-{uuid.uuid4().hex[:8]}"
+        if self._sampler:
+            path = directory / f"{name}.stacks"
+            path.write_text(
+                "".join(f"{stack} {count}\n" for stack, count in self._sampler.stacks.most_common()),
+                encoding="utf-8",
+            )
+        else:
+            path = directory / f"{name}.prof"
+            self._profile.dump_stats(path)
+        meta = {**meta, "mode": self.mode, "file": path.name}
+        (directory / f"{name}.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        return path
+
+
+def dataset_size(user) -> dict:
+    from . import shards
+    from .models import Task, TaskChecklistItem
+
+    if user is None or not user.is_authenticated:
+        return {}
+    # Roda depois da view, quando o ShardScopeMixin já desfez o escopo do shard.
+    try:
+        with shards.owner_scope(user.pk):
+            return {
+                "tasks": Task.objects.filter(owner=user).count(),
+                "checklist_items": TaskChecklistItem.objects.filter(task__owner=user).count(),
+            }
+    except shards.OwnerMoving:
+        return {}
+
+
+def load_meta(directory: Path) -> list[dict]:
+    profiles = []
+    for path in sorted(directory.glob("*.json")):
+        try:
+            meta = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            continue
+        if (directory / meta.get("file", "")).exists():
+            profiles.append(meta)
+    return profiles
+
+
+def read_stacks(path: Path) -> Counter:
+    stacks = Counter()
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+
+def elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
@@ -0,0 +1,60 @@
+"""Consultas de escrita em uma única ida ao banco."""
+from __future__ import annotations
+
+from django.db import connections, router, transaction
+from django.db.models.sql import UpdateQuery
+
+
+def supports_update_returning(connection) -> bool:
+    if connection.vendor == "postgresql":
+        return True
+    # SQLite ganhou RETURNING (INSERT/UPDATE/DELETE) na 3.35.
+    return connection.vendor == "sqlite" and connection.features.can_return_columns_from_insert
+
+
+def _convert_row(model, connection, names, row):
+    """Aplica os mesmos conversores que o ORM usa ao ler as colunas."""
+    values = []
+    for name, value in zip(names, row):
+        column = model._meta.get_field(name).get_col(model._meta.db_table)
+        for converter in connection.ops.get_db_converters(column) + column.get_db_converters(connection):
+            value = converter(value, column, connection)
+        values.append(value)
+    return values
+
+
+def update_returning(queryset, returning, **values):
+    """
+    Executa ``queryset.update(**values)`` e devolve a primeira linha alterada
+    como instância parcial do modelo (só com os campos de ``returning``), ou
+    ``None`` se nada casou com o filtro.
+
+    Usa ``UPDATE ... RETURNING`` quando o banco suporta; senão, UPDATE + SELECT
+    na mesma transação. Os filtros não devem depender dos campos alterados.
+    """
+    model = queryset.model
+    names = [model._meta.pk.attname] + [name for name in returning if name != model._meta.pk.attname]
+    using = router.db_for_write(model)
+    connection = connections[using]
+
+    if not supports_update_returning(connection):
+        with transaction.atomic(using=using):
+            if not queryset.using(using).update(**values):
+                return None
+            row = queryset.using(using).values_list(*names).first()
+        return model.from_db(using, names, row) if row else None
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    query.annotations = {}
+    compiler = query.get_compiler(using)
+    compiler.pre_sql_setup()
+    sql, params = compiler.as_sql()
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(model._meta.get_field(name).column) for name in names)
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {columns}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return model.from_db(using, names, _convert_row(model, connection, names, row))
@@ -0,0 +1,43 @@
+"""
+Renderer JSON com ``orjson`` quando a biblioteca está instalada.
+
+A saída é a mesma do ``JSONRenderer`` do DRF (compacta, UTF-8, ``\\u2028`` e
+``\\u2029`` escapados): datas, horários e textos preguiçosos passam pelo
+mesmo ``JSONEncoder.default`` do DRF. Sem ``orjson``, ou quando o cliente
+pede indentação, o renderer padrão é usado.
+"""
+from __future__ import annotations
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+# Datas/horários saem pelo encoder do DRF (ex.: "Z" no lugar de "+00:00").
+ORJSON_OPTIONS = (
+    (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Inteiros acima de 64 bits, aninhamento profundo etc.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Mesmo escape do DRF para U+2028/U+2029 (quebram JSON embutido em JS).
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,114 @@
+"""
+Leituras em réplicas do banco.
+
+``ReplicaRouter`` manda as leituras para a réplica escolhida no início da
+requisição (``contextvar``); sem réplica escolhida, tudo fica no ``default``.
+Só as views com ``ReplicaReadMixin`` escolhem réplica, e só nas ações de
+leitura declaradas. Depois de uma escrita, as leituras daquele usuário ficam
+no primário por ``REPLICA_PIN_SECONDS`` (marca no cache) para ele sempre ver
+o que acabou de gravar. Por isso as réplicas só valem com um cache
+compartilhado entre os workers: com ``PROCESS_LOCAL_CACHES`` tudo fica no
+primário (e o settings recusa subir assim).
+"""
+from __future__ import annotations
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+_read_alias: ContextVar[str | None] = ContextVar("read_alias", default=None)
+
+
+def enabled() -> bool:
+    return bool(settings.DATABASE_REPLICAS) and (
+        settings.CACHES["default"]["BACKEND"] not in settings.PROCESS_LOCAL_CACHES
+    )
+
+
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_primary(user_id) -> None:
+    """Mantém as leituras de ``user_id`` no primário pela janela configurada."""
+    if enabled() and user_id is not None:
+        cache.set(_pin_key(user_id), 1, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id) -> bool:
+    return cache.get(_pin_key(user_id)) is not None
+
+
+def current_read_alias() -> str | None:
+    return _read_alias.get()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do primário.
+        return True
+
+
+def _token_user_id(request):
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header else None
+    if raw is None:
+        return None
+    try:
+        return auth.get_validated_token(raw).get(jwt_settings.USER_ID_CLAIM)
+    except Exception:  # token inválido: a autenticação da view responde 401
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Para views do DRF: em leituras (``replica_actions`` nos viewsets, GET nas
+    demais) escolhe uma réplica antes da autenticação, para que a busca do
+    usuário também saia do primário; escritas bem-sucedidas fixam o usuário
+    no primário.
+    """
+
+    replica_actions = ()
+
+    def _reads_from_replica(self, request):
+        if not enabled() or request.method not in SAFE_METHODS:
+            return False
+        action = getattr(self, "action", None)
+        if action is not None and action not in self.replica_actions:
+            return False
+        user_id = _token_user_id(request)
+        return user_id is not None and not is_pinned(user_id)
+
+    def initial(self, request, *args, **kwargs):
+        if self._reads_from_replica(request):
+            self._replica_token = _read_alias.set(random.choice(settings.DATABASE_REPLICAS))
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                pin_primary(user.pk)
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                _read_alias.reset(self._replica_token)
@@ -0,0 +1,188 @@
+"""
+Geração de dados em volume para benchmarks e testes de carga.
+
+Usuários, tarefas e itens de checklist são inseridos em blocos, um
+``transaction.atomic`` por bloco, pelos helpers de ``todos.bulk``. A senha é transformada em hash uma única vez e reaproveitada
+por todos os usuários gerados. Com shards, as tarefas de cada bloco são
+separadas pelo shard do dono (uma transação por shard).
+"""
+from __future__ import annotations
+
+import contextlib
+import itertools
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from . import shards
+from .bulk import insert_checklist_items, insert_tasks
+from .models import Task
+from .serializers import TASK_TAGS
+
+DEFAULT_PASSWORD = "Demo@123!"
+
+# Distribuições aproximadas do uso real (valor, peso).
+STATUS_WEIGHTS = [("pendente", 65), ("concluida", 35)]
+IMPORTANCE_WEIGHTS = [("baixa", 30), ("media", 50), ("alta", 20)]
+CATEGORY_WEIGHTS = [("pessoal", 30), ("trabalho", 30), ("estudos", 15), ("casa", 15), ("saude", 10)]
+TAG_COUNT_WEIGHTS = [(0, 40), (1, 40), (2, 15), (3, 5)]
+CHECKLIST_SIZE_WEIGHTS = [(0, 50), (1, 10), (2, 10), (3, 10), (4, 8), (5, 6), (8, 4), (12, 2)]
+NO_DUE_DATE_RATIO = 0.3
+
+TITLES = [
+    "Revisar relatório", "Pagar contas", "Estudar Django", "Ir à academia",
+    "Responder e-mails", "Preparar apresentação", "Comprar mantimentos",
+    "Ler capítulo", "Organizar armário", "Consulta médica", "Planejar sprint",
+]
+
+
+def _picker(rng: random.Random, weights):
+    # Tabela expandida pelos pesos: sortear vira um índice, bem mais barato
+    # que ``rng.choices`` chamado milhões de vezes.
+    table = [value for value, weight in weights for _ in range(weight)]
+    size = len(table)
+    random_value = rng.random
+    return lambda: table[int(random_value() * size)]
+
+
+@contextlib.contextmanager
+def _fast_sqlite_writes(using):
+    """No SQLite, dispensa o fsync por transação enquanto a carga roda."""
+    connection = connections[using]
+    # O PRAGMA não pode mudar dentro de uma transação (ex.: TestCase).
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        previous = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous = OFF")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA synchronous = {int(previous)}")
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _next_suffix(prefix: str) -> int:
+    """Primeiro ``n`` livre em ``<prefix>_<n>``: um depois do maior sufixo já usado."""
+    usernames = User.objects.filter(username__startswith=f"{prefix}_").values_list("username", flat=True)
+    suffixes = (name[len(prefix) + 1:] for name in usernames.iterator())
+    return max((int(suffix) + 1 for suffix in suffixes if suffix.isdigit()), default=0)
+
+
+def bulk_seed(
+    users: int,
+    tasks_per_user: int,
+    checklist_per_task: int | None = None,
+    tags_per_task: int | None = None,
+    prefix: str = "bench",
+    password: str = DEFAULT_PASSWORD,
+    chunk_size: int = 5000,
+    history_days: int = 365,
+    seed: int = 42,
+    progress=None,
+) -> list[User]:
+    """
+    Cria ``users`` usuários ativos com ``tasks_per_user`` tarefas cada.
+
+    ``checklist_per_task``/``tags_per_task`` fixam as quantidades; quando
+    ``None`` elas seguem as distribuições do módulo. ``progress`` recebe
+    ``(tarefas_criadas, total)`` ao fim de cada bloco.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    pick_status = _picker(rng, STATUS_WEIGHTS)
+    pick_importance = _picker(rng, IMPORTANCE_WEIGHTS)
+    pick_category = _picker(rng, CATEGORY_WEIGHTS)
+    pick_tag_count = (lambda: tags_per_task) if tags_per_task is not None else _picker(rng, TAG_COUNT_WEIGHTS)
+    pick_checklist = (
+        (lambda: checklist_per_task)
+        if checklist_per_task is not None
+        else _picker(rng, CHECKLIST_SIZE_WEIGHTS)
+    )
+    history_seconds = max(history_days, 1) * 86400
+    random_value = rng.random
+    # Combinações de tags pré-montadas por quantidade (listas compartilhadas).
+    tag_pool = {
+        k: [list(combo) for combo in itertools.combinations(TASK_TAGS, k)]
+        for k in range(len(TASK_TAGS) + 1)
+    }
+
+    hashed = make_password(password)
+    start = _next_suffix(prefix)
+    created_users = []
+    for chunk in _chunks(range(start, start + users), chunk_size):
+        with transaction.atomic():
+            created_users.extend(
+                User.objects.bulk_create(
+                    User(
+                        username=f"{prefix}_{n}",
+                        email=f"{prefix}_{n}@datacake.local",
+                        password=hashed,
+                        is_active=True,
+                    )
+                    for n in chunk
+                )
+            )
+
+    def task_rows():
+        for user in created_users:
+            for n in range(tasks_per_user):
+                created_at = now - timedelta(seconds=int(random_value() * history_seconds))
+                due_date = None
+                if random_value() >= NO_DUE_DATE_RATIO:
+                    due_date = created_at.date() + timedelta(days=int(rng.triangular(-5, 60, 7)))
+                row = (
+                    user.id,
+                    f"{rng.choice(TITLES)} #{n}",
+                    "" if random_value() < 0.5 else "Gerada para teste de carga.",
+                    pick_status(),
+                    pick_importance(),
+                    pick_category(),
+                    rng.choice(tag_pool[min(pick_tag_count(), len(TASK_TAGS))]),
+                    due_date,
+                    "nenhuma",
+                    created_at,
+                    min(now, created_at + timedelta(days=int(random_value() * 31))),
+                )
+                yield row, pick_checklist()
+
+    default_alias = router.db_for_write(Task)
+    placement = {user.id: shards.shard_for(user.id) for user in created_users} if shards.enabled() else {}
+    total = users * tasks_per_user
+    done = 0
+    with contextlib.ExitStack() as stack:
+        for alias in set(placement.values()) or {default_alias}:
+            stack.enter_context(_fast_sqlite_writes(alias))
+        for chunk in _chunks(task_rows(), chunk_size):
+            by_alias = {}
+            for entry in chunk:
+                by_alias.setdefault(placement.get(entry[0][0], default_alias), []).append(entry)
+            for alias, entries in by_alias.items():
+                with transaction.atomic(using=alias):
+                    task_ids = insert_tasks([row for row, _ in entries], using=alias)
+                    items = []
+                    for task_id, (row, size) in zip(task_ids, entries):
+                        concluded = row[3] == "concluida"
+                        items.extend(
+                            (task_id, f"Passo {i + 1}", concluded or random_value() < 0.4, i)
+                            for i in range(size)
+                        )
+                    if items:
+                        insert_checklist_items(items, using=alias)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+    return created_users
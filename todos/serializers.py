@@ -1,9 +1,49 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Task, TaskChecklistItem
+from django.db.models import Count, Q
+from .models import ArchivedTask, ArchivedTaskChecklistItem, Task, TaskChecklistItem
+from .password_policy import get_policy
 import re
 
 TASK_TAGS = ["Trabalho", "Estudos", "Casa", "Saúde"]
+USERNAME_RE = re.compile(r"^[a-zA-Z0-9_.-]{3,30}$")
+
+
+# Regras de validação compartilhadas com a importação em massa (todos/importer.py).
+def clean_title(value):
+    value = value.strip()
+    if not value:
+        raise serializers.ValidationError("O título não pode estar vazio.")
+    if len(value) > 60:
+        raise serializers.ValidationError("O título deve ter no máximo 60 caracteres.")
+    return value
+
+
+def clean_description(value):
+    if value and len(value) > 500:
+        raise serializers.ValidationError("A descrição deve ter no máximo 500 caracteres.")
+    return value
+
+
+def clean_tags(value):
+    tags = []
+    for tag in value or []:
+        normalized = tag.strip().title()
+        if normalized not in TASK_TAGS:
+            raise serializers.ValidationError(
+                f"Tag '{tag}' não é válida. Use opções: {', '.join(TASK_TAGS)}."
+            )
+        tags.append(normalized)
+    return tags
+
+
+def clean_checklist_label(value):
+    value = value.strip()
+    if not value:
+        raise serializers.ValidationError("O item do checklist não pode ser vazio.")
+    if len(value) > 150:
+        raise serializers.ValidationError("O item do checklist deve ter até 150 caracteres.")
+    return value
 
 
 class TaskChecklistItemSerializer(serializers.ModelSerializer):
@@ -14,20 +54,21 @@ class TaskChecklistItemSerializer(serializers.ModelSerializer):
         fields = ["id", "label", "done", "order"]
 
     def validate_label(self, value):
-        value = value.strip()
-        if not value:
-            raise serializers.ValidationError("O item do checklist não pode ser vazio.")
-        if len(value) > 150:
-            raise serializers.ValidationError("O item do checklist deve ter até 150 caracteres.")
-        return value
+        return clean_checklist_label(value)
 
 
 class TaskSerializer(serializers.ModelSerializer):
+    # Contagens agregadas no SQL (anotadas em ``TaskViewSet.get_queryset``);
+    # só aparecem quando pedidas explicitamente em ``fields``.
+    OPTIONAL_FIELDS = ("checklist_done", "checklist_total")
+
     checklist_items = TaskChecklistItemSerializer(many=True, required=False)
     tags = serializers.ListField(
         child=serializers.CharField(), required=False, allow_empty=True
     )
     due_date = serializers.DateField(required=False, allow_null=True)
+    checklist_done = serializers.IntegerField(read_only=True)
+    checklist_total = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Task
@@ -44,32 +85,26 @@ class TaskSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "checklist_items",
+            "checklist_done",
+            "checklist_total",
         ]
         read_only_fields = ["id", "created_at", "updated_at", "recurrence"]
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(fields) if fields is not None else set(self.fields) - set(self.OPTIONAL_FIELDS)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
     def validate_title(self, value):
-        value = value.strip()
-        if not value:
-            raise serializers.ValidationError("O título não pode estar vazio.")
-        if len(value) > 60:
-            raise serializers.ValidationError("O título deve ter no máximo 60 caracteres.")
-        return value
+        return clean_title(value)
 
     def validate_description(self, value):
-        if value and len(value) > 500:
-            raise serializers.ValidationError("A descrição deve ter no máximo 500 caracteres.")
-        return value
+        return clean_description(value)
 
     def validate_tags(self, value):
-        tags = []
-        for tag in value or []:
-            normalized = tag.strip().title()
-            if normalized not in TASK_TAGS:
-                raise serializers.ValidationError(
-                    f"Tag '{tag}' não é válida. Use opções: {', '.join(TASK_TAGS)}."
-                )
-            tags.append(normalized)
-        return tags
+        return clean_tags(value)
 
     def validate_due_date(self, value):
         return value
@@ -113,50 +148,95 @@ class TaskSerializer(serializers.ModelSerializer):
         TaskChecklistItem.objects.filter(task=task).exclude(id__in=keep_ids).delete()
 
 
+class ArchivedTaskChecklistItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedTaskChecklistItem
+        fields = ["id", "label", "done", "order"]
+
+
+class ArchivedTaskSerializer(TaskSerializer):
+    """Somente leitura: mesmo formato do ``TaskSerializer`` mais ``archived_at``."""
+
+    checklist_items = ArchivedTaskChecklistItemSerializer(many=True, read_only=True)
+
+    class Meta(TaskSerializer.Meta):
+        model = ArchivedTask
+        fields = TaskSerializer.Meta.fields + ["archived_at"]
+        read_only_fields = fields
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     confirm_password = serializers.CharField(write_only=True)
 
     class Meta:
         model = User
         fields = ["username", "email", "password", "confirm_password"]
-        extra_kwargs = {"password": {"write_only": True}}
+        # Unicidade fica em _taken (uma consulta, sem diferenciar caixa).
+        extra_kwargs = {"password": {"write_only": True}, "username": {"validators": []}}
 
     def validate_username(self, value):
         value = value.strip()
-        if User.objects.filter(username__iexact=value).exists():
-            raise serializers.ValidationError("Esse usuário já existe, insira um usuário válido.")
-        if not re.match(r"^[a-zA-Z0-9_.-]{3,30}$", value):
+        if not USERNAME_RE.match(value):
             raise serializers.ValidationError(
                 "Usuário inválido. Use 3-30 caracteres (letras, números, . _ -)."
             )
         return value
 
     def validate_email(self, value):
-        value = value.strip()
-        if User.objects.filter(email__iexact=value).exists():
-            raise serializers.ValidationError("Esse e-mail já existe, insira um e-mail válido.")
-        return value
+        return value.strip()
 
     def validate_password(self, value):
-        if len(value) < 8:
-            raise serializers.ValidationError("A senha deve ter pelo menos 8 caracteres.")
-        if not re.search(r"[A-Z]", value):
-            raise serializers.ValidationError("A senha deve conter pelo menos uma letra maiúscula.")
-        if not re.search(r"[a-z]", value):
-            raise serializers.ValidationError("A senha deve conter pelo menos uma letra minúscula.")
-        if not re.search(r"[0-9]", value):
-            raise serializers.ValidationError("A senha deve conter pelo menos um número.")
-        if not re.search(r"[^A-Za-z0-9]", value):
-            raise serializers.ValidationError("A senha deve conter pelo menos um símbolo.")
+        errors = get_policy().errors(value)
+        if errors:
+            raise serializers.ValidationError(errors[0])
         return value
 
+    def to_internal_value(self, data):
+        # A unicidade roda junto com os validadores de campo: um usuário já
+        # usado volta no mesmo payload que, por exemplo, uma senha fraca.
+        try:
+            attrs = super().to_internal_value(data)
+            errors = {}
+        except serializers.ValidationError as exc:
+            attrs, errors = None, dict(exc.detail)
+        values = {
+            name: data.get(name).strip()
+            for name in ("username", "email")
+            if name not in errors and isinstance(data.get(name), str)
+        }
+        errors.update(self._taken(**values))
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
     def validate(self, attrs):
-        attrs["username"] = attrs.get("username", "").strip()
-        attrs["email"] = attrs.get("email", "").strip()
         if attrs.get("password") != attrs.get("confirm_password"):
             raise serializers.ValidationError({"confirm_password": "As senhas não coincidem."})
         return attrs
 
+    @staticmethod
+    def _taken(username=None, email=None):
+        """Usuário e e-mail já usados (sem diferenciar caixa), numa consulta só."""
+        conditions = {}
+        if username is not None:
+            conditions["username"] = Q(username__iexact=username)
+        if email is not None:
+            conditions["email"] = Q(email__iexact=email)
+        if not conditions:
+            return {}
+        any_match = Q()
+        for condition in conditions.values():
+            any_match |= condition
+        # Contagem condicional por campo: várias linhas com o e-mail não escondem a do usuário.
+        taken = User.objects.filter(any_match).aggregate(
+            **{name: Count("pk", filter=condition) for name, condition in conditions.items()}
+        )
+        messages = {
+            "username": "Esse usuário já existe, insira um usuário válido.",
+            "email": "Esse e-mail já existe, insira um e-mail válido.",
+        }
+        return {name: [messages[name]] for name, count in taken.items() if count}
+
     def create(self, validated_data):
         validated_data.pop("confirm_password")
         user = User.objects.create_user(
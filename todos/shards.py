@@ -0,0 +1,242 @@
+"""
+Dados por usuário divididos entre vários bancos SQLite (shards).
+
+Com ``DATABASE_SHARD_PATHS`` definido, as tabelas por dono (``SHARDED_MODELS``:
+tarefas, checklist, arquivo e chaves de idempotência) ficam no shard do
+usuário; usuários, auth, sessões e eventos SSE continuam no ``default``. A
+posição de cada usuário fica em ``ShardAssignment`` (no ``default``): no
+primeiro acesso ele entra no shard ``id % N`` e daí em diante só a tabela
+vale, então ``rebalance_shard`` pode movê-lo sem mudar o hash.
+
+``ShardScopeMixin`` resolve o shard logo após a autenticação e o guarda num
+``contextvar`` que o ``ShardRouter`` consulta; fora de uma view, use
+``owner_scope(user_id)``. Sem escopo, as consultas vão para o ``default``.
+
+Cada shard guarda uma cópia mínima (inativa, sem senha) da linha do usuário
+para as chaves estrangeiras, e começa as sequências de id em
+``posição * SHARD_ID_SPAN``: ids não se repetem entre shards e uma mudança
+de shard preserva os ids que o app já conhece.
+"""
+from __future__ import annotations
+
+import contextlib
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Count
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+SHARDED_MODELS = frozenset({
+    "todos.task",
+    "todos.taskchecklistitem",
+    "todos.archivedtask",
+    "todos.archivedtaskchecklistitem",
+    "todos.idempotencykey",
+})
+# Ids do shard na posição p (1, 2, ...) começam em p * SHARD_ID_SPAN; abaixo
+# disso ficam os ids do default de antes dos shards.
+SHARD_ID_SPAN = 10**12
+
+_shard: ContextVar[str | None] = ContextVar("shard", default=None)
+
+
+class OwnerMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Suas tarefas estão sendo movidas de banco. Tente novamente em instantes."
+    default_code = "owner_moving"
+
+
+def enabled() -> bool:
+    return bool(settings.DATABASE_SHARDS)
+
+
+def is_sharded(model) -> bool:
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def databases() -> list[str]:
+    """Bancos que guardam tabelas por dono (para comandos de manutenção)."""
+    return list(settings.DATABASE_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def hash_shard(owner_id) -> str:
+    return settings.DATABASE_SHARDS[int(owner_id) % len(settings.DATABASE_SHARDS)]
+
+
+def _assignments():
+    from .models import ShardAssignment
+
+    return ShardAssignment.objects.using(router.db_for_write(ShardAssignment))
+
+
+def ensure_owner_row(alias: str, owner_id) -> None:
+    """Cópia mínima do usuário no shard, só para as chaves estrangeiras."""
+    if alias == DEFAULT_DB_ALIAS:
+        return
+    User.objects.using(alias).get_or_create(
+        pk=owner_id,
+        defaults={"username": f"shard-owner-{owner_id}", "password": "!", "is_active": False},
+    )
+
+
+def shard_for(owner_id, create: bool = True) -> str | None:
+    """
+    Banco das tabelas por dono de ``owner_id`` (``None`` sem shards). No
+    primeiro acesso grava a posição pelo hash; com ``create=False``, devolve
+    ``None`` para quem ainda não tem posição.
+    """
+    if not enabled() or owner_id is None:
+        return None
+    row = _assignments().filter(owner_id=owner_id).values_list("alias", "moving").first()
+    if row is None:
+        if not create:
+            return None
+        alias = hash_shard(owner_id)
+        ensure_owner_row(alias, owner_id)
+        assignment, _ = _assignments().get_or_create(owner_id=owner_id, defaults={"alias": alias})
+        row = (assignment.alias, assignment.moving)
+    alias, moving = row
+    if moving:
+        raise OwnerMoving()
+    return alias
+
+
+def current_shard() -> str | None:
+    return _shard.get()
+
+
+@contextlib.contextmanager
+def owner_scope(owner_id):
+    """Roteia as tabelas por dono para o shard de ``owner_id`` dentro do bloco."""
+    token = _shard.set(shard_for(owner_id))
+    try:
+        yield
+    finally:
+        _shard.reset(token)
+
+
+class ShardRouter:
+    """Antes do ``ReplicaRouter``: só responde pelos modelos de ``SHARDED_MODELS``."""
+
+    def _route(self, model, **hints):
+        if not settings.DATABASE_SHARDS or not is_sharded(model):
+            return None
+        # Relações a partir de uma instância já lida (ex.: ``task.checklist_items``).
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in settings.DATABASE_SHARDS:
+            return instance._state.db
+        return _shard.get()
+
+    db_for_read = _route
+    db_for_write = _route
+
+
+class ShardScopeMixin:
+    """Para views do DRF: depois da autenticação, as tabelas por dono vão para o shard do usuário."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if enabled() and request.user.is_authenticated:
+            self._shard_token = _shard.set(shard_for(request.user.pk))
+
+    def dispatch(self, request, *args, **kwargs):
+        self._shard_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._shard_token is not None:
+                _shard.reset(self._shard_token)
+
+
+def reserve_id_ranges(using: str) -> None:
+    """Começa as sequências de id do shard ``using`` na faixa dele (só SQLite)."""
+    if using not in settings.DATABASE_SHARDS:
+        return
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    from django.apps import apps
+
+    start = (settings.DATABASE_SHARDS.index(using) + 1) * SHARD_ID_SPAN
+    tables = [
+        model._meta.db_table
+        for label in SHARDED_MODELS
+        for model in [apps.get_model(label)]
+        if model._meta.pk.get_internal_type() in ("AutoField", "BigAutoField")
+    ]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, start])
+            elif row[0] < start:
+                cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s", [start, table])
+
+
+def least_loaded() -> str:
+    """Shard com menos usuários posicionados."""
+    counts = dict(
+        _assignments().filter(alias__in=settings.DATABASE_SHARDS)
+        .values_list("alias").annotate(total=Count("owner"))
+    )
+    return min(settings.DATABASE_SHARDS, key=lambda alias: (counts.get(alias, 0), alias))
+
+
+def _copy_rows(source, target, model, where, params, batch_size):
+    qn = connections[target].ops.quote_name
+    columns = ", ".join(qn(field.column) for field in model._meta.concrete_fields)
+    placeholders = ", ".join("%s" for _ in model._meta.concrete_fields)
+    table = qn(model._meta.db_table)
+    copied = 0
+    with connections[source].cursor() as reader, connections[target].cursor() as writer:
+        reader.execute(f"SELECT {columns} FROM {table} WHERE {where}", params)
+        while rows := reader.fetchmany(batch_size):
+            writer.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows)
+            copied += len(rows)
+    return copied
+
+
+def move_owner(owner_id, target: str, batch_size: int = 1000, grace: float = 1.0, progress=None) -> dict:
+    """
+    Move as tabelas por dono de ``owner_id`` para ``target``; devolve as linhas
+    copiadas por tabela. Quem ainda não tem posição sai do ``default`` (dados
+    de antes dos shards). Durante a cópia o usuário recebe 503; ``grace`` (s)
+    espera as requisições em andamento terminarem antes de copiar.
+    """
+    from .accounts import _delete_in_batches, _steps
+
+    row = _assignments().filter(owner_id=owner_id).values_list("alias", flat=True).first()
+    source = row or DEFAULT_DB_ALIAS
+    if source == target:
+        return {}
+    _assignments().update_or_create(owner_id=owner_id, defaults={"alias": source, "moving": True})
+    if grace:
+        time.sleep(grace)
+
+    # Pais antes dos filhos na cópia; folhas antes da raiz na remoção.
+    steps = [step for step in _steps(connections[target]) if is_sharded(step[1])]
+    copied = {}
+    try:
+        ensure_owner_row(target, owner_id)
+        with transaction.atomic(using=target):
+            for name, model, where in reversed(steps):
+                copied[name] = _copy_rows(source, target, model, where, [owner_id], batch_size)
+                if progress:
+                    progress(name, copied[name])
+    except BaseException:
+        _assignments().filter(owner_id=owner_id).update(moving=False)
+        raise
+    _assignments().filter(owner_id=owner_id).update(alias=target, moving=False)
+
+    connection = connections[source]
+    for name, model, where in steps:
+        for _ in _delete_in_batches(connection, source, model, where, [owner_id], batch_size):
+            pass
+    if source != DEFAULT_DB_ALIAS:
+        User.objects.using(source).filter(pk=owner_id).delete()
+    return copied
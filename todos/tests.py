@@ -1,3 +1,1529 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import importlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from server import settings as server_settings
+from todos import events, health, shards
+from todos import urls as todos_urls
+from todos.accounts import delete_account
+from todos.archive import archive_tasks
+from todos.bulk import insert_tasks
+from todos.compression import compress_chunks, negotiate
+from todos.logging_utils import BackgroundStreamHandler, JSONFormatter, SamplingFilter
+from todos.management.commands.startup_report import parse_importtime
+from todos.middleware import SessionMiddleware
+from todos.models import (
+    ArchivedTask,
+    ArchivedTaskChecklistItem,
+    EmailVerificationCode,
+    IdempotencyKey,
+    ShardAssignment,
+    Task,
+    TaskChecklistItem,
+    TaskEvent,
+)
+from todos.parsers import FastJSONParser
+from todos.password_policy import get_policy
+from todos.renderers import FastJSONRenderer
+from todos.replicas import current_read_alias
+from todos.queries import supports_update_returning
+from todos.seeding import DEFAULT_PASSWORD, bulk_seed
+from todos.serializers import RegisterSerializer, TaskSerializer
+from todos.views import COMPACT_TASK_FIELDS, TASK_ORDERINGS
+from todos.warmup import warmup
+
+NEW_PASSWORD = "Nova@Senha1"
+
+TASK_PAYLOAD = {
+    "title": "Tarefa medida",
+    "description": "Corpo fixo para o orçamento de consultas.",
+    "importance": "alta",
+    "category": "trabalho",
+    "tags": ["Trabalho"],
+    "checklist_items": [{"label": "Primeiro"}, {"label": "Segundo"}],
+}
+
+# Orçamento de consultas SQL por rota de ``todos/urls.py``: (método, máximo).
+# Cada rota é medida com volumes diferentes de tarefas do usuário; a contagem
+# precisa ficar dentro do orçamento e não pode crescer com o volume.
+# ``método:variante`` mede a mesma rota com outros parâmetros.
+QUERY_BUDGETS = {
+    "task-list": [("get", 3), ("get:compact", 2), ("get:counts", 2), ("get:archived", 3), ("post", 7)],
+    "task-detail": [("get", 3), ("put", 8), ("patch", 5), ("delete", 6)],
+    "task-toggle": [("post", 4), ("post:minimal", 3)],
+    "task-export": [("get", 4)],
+    "task-calendar": [("get", 2)],
+    "task-events": [("get", 3)],
+    "task-checklist": [("get", 3), ("post", 5)],
+    "task-checklist-toggle": [("post", 3)],
+    "task-checklist-reorder": [("post", 5)],
+    "task-import": [("post", 7)],
+    "register": [("post", 3)],
+    "verify-email": [("post", 4)],
+    "resend-code": [("post", 3)],
+    "resolve-username": [("post", 1)],
+    "token_obtain_pair": [("post", 2)],
+    "token_refresh": [("post", 0)],
+    "logout": [("post", 1)],
+    "me": [("get", 1), ("delete", 34)],
+    "password-reset": [("post", 2)],
+    "password-confirm": [("post", 4)],
+    "health": [("get", 0)],
+    "health-ready": [("get", 4)],
+    "metrics": [("get", 0)],
+}
+UNBUDGETED_ROUTES = {"api-root"}
+CONTENT_TYPES = {("task-import", "post"): "application/x-ndjson"}
+IMPORT_BODY = "\n".join(
+    json.dumps(row)
+    for row in [
+        {"title": "Importada 1", "tags": ["Casa"], "checklist_items": ["A", "B"]},
+        {"title": "Importada 2", "status": "concluida", "due_date": "2026-01-31"},
+        {"title": ""},
+    ]
+)
+DATASET_SIZES = (1, 10, 40)
+
+
+def _body(response):
+    """Corpo completo, inclusive de streaming assíncrono (SSE)."""
+    if not response.streaming:
+        return response.content
+    if response.is_async:
+        async def collect():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        return async_to_sync(collect)()
+    return b"".join(response.streaming_content)
+
+
+def _route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    # O stream SSE encerra logo depois do backlog.
+    TASK_EVENTS_MAX_SECONDS=0.01,
+    # A prontidão recalcula sempre (sem o cache em memória entre as medições).
+    HEALTH_READY_TTL=0,
+)
+class QueryBudgetTests(TestCase):
+    def _dataset(self, size):
+        user = bulk_seed(
+            users=1,
+            tasks_per_user=size,
+            checklist_per_task=3,
+            tags_per_task=1,
+            prefix=f"budget{size}",
+        )[0]
+        refresh = RefreshToken.for_user(user)
+        task = Task.objects.filter(owner=user).order_by("id").first()
+        EmailVerificationCode.objects.create(user=user, code="123456")
+        return {
+            "user": user,
+            "access": str(refresh.access_token),
+            "refresh": str(refresh),
+            "task": task,
+            "size": size,
+        }
+
+    def _request(self, route, method, ctx):
+        """Monta (url, corpo, autenticado?, status esperado) para a rota."""
+        user, task, size = ctx["user"], ctx["task"], ctx["size"]
+        detail = f"/api/tasks/{task.id}/"
+        items = list(task.checklist_items.values_list("id", flat=True))
+        requests = {
+            ("task-list", "get"): ("/api/tasks/", None, True, 200),
+            ("task-list", "get:compact"): ("/api/tasks/?compact=1", None, True, 200),
+            ("task-list", "get:archived"): ("/api/tasks/?archived=1", None, True, 200),
+            ("task-list", "get:counts"): (
+                "/api/tasks/?compact=1&fields=id,title,checklist_done,checklist_total",
+                None,
+                True,
+                200,
+            ),
+            ("task-list", "post"): ("/api/tasks/", TASK_PAYLOAD, True, 201),
+            ("task-detail", "get"): (detail, None, True, 200),
+            ("task-detail", "put"): (detail, TASK_PAYLOAD, True, 200),
+            ("task-detail", "patch"): (detail, {"title": "Novo título"}, True, 200),
+            ("task-detail", "delete"): (detail, None, True, 204),
+            ("task-toggle", "post"): (f"{detail}toggle/", None, True, 200),
+            ("task-toggle", "post:minimal"): (f"{detail}toggle/?minimal=1", None, True, 200),
+            ("task-export", "get"): ("/api/tasks/export/", None, True, 200),
+            ("task-calendar", "get"): ("/api/tasks/calendar/", None, True, 200),
+            ("task-events", "get"): ("/api/tasks/events/?last_event_id=0", None, True, 200),
+            ("task-checklist", "get"): (f"{detail}checklist/", None, True, 200),
+            ("task-checklist", "post"): (f"{detail}checklist/", {"label": "Novo item"}, True, 201),
+            ("task-checklist-toggle", "post"): (
+                f"{detail}checklist/{items[0]}/toggle/", None, True, 200
+            ),
+            ("task-checklist-reorder", "post"): (
+                f"{detail}checklist/reorder/", {"order": items[::-1]}, True, 200
+            ),
+            ("task-import", "post"): ("/api/tasks/import/", IMPORT_BODY, True, 200),
+            ("register", "post"): (
+                "/api/auth/register/",
+                {
+                    "username": f"novo{size}",
+                    "email": f"novo{size}@datacake.local",
+                    "password": NEW_PASSWORD,
+                    "confirm_password": NEW_PASSWORD,
+                },
+                False,
+                201,
+            ),
+            ("verify-email", "post"): (
+                "/api/auth/verify/", {"email": user.email, "code": "123456"}, False, 200
+            ),
+            ("resend-code", "post"): ("/api/auth/resend/", {"email": user.email}, False, 200),
+            ("resolve-username", "post"): (
+                "/api/auth/resolve-username/", {"identifier": user.email}, False, 200
+            ),
+            ("token_obtain_pair", "post"): (
+                "/api/auth/token/",
+                {"identifier": user.username, "password": DEFAULT_PASSWORD},
+                False,
+                200,
+            ),
+            ("token_refresh", "post"): (
+                "/api/auth/token/refresh/", {"refresh": ctx["refresh"]}, False, 200
+            ),
+            ("logout", "post"): ("/api/auth/logout/", None, True, 200),
+            ("me", "get"): ("/api/auth/me/", None, True, 200),
+            ("me", "delete"): ("/api/auth/me/", {"password": DEFAULT_PASSWORD}, True, 200),
+            ("password-reset", "post"): (
+                "/api/auth/password/reset/", {"email": user.email}, False, 200
+            ),
+            ("password-confirm", "post"): (
+                "/api/auth/password/confirm/",
+                {"email": user.email, "code": "123456", "password": NEW_PASSWORD},
+                False,
+                200,
+            ),
+            ("health", "get"): ("/api/health/", None, False, 200),
+            ("health-ready", "get"): ("/api/health/ready/", None, False, 200),
+            ("metrics", "get"): ("/api/metrics/", None, False, 200),
+        }
+        return requests[(route, method)]
+
+    def _measure(self, route, method, size):
+        # Prontidão parte do zero em cada medição (o processo guarda o que já verificou).
+        health.reset()
+        ctx = self._dataset(size)
+        url, data, authenticated, expected_status = self._request(route, method, ctx)
+        extra = {"HTTP_AUTHORIZATION": f"Bearer {ctx['access']}"} if authenticated else {}
+        content_type = CONTENT_TYPES.get((route, method), "application/json")
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method.split(":")[0])(
+                url, data, content_type=content_type, **extra
+            )
+            body = _body(response)
+        self.assertEqual(
+            response.status_code,
+            expected_status,
+            f"{method.upper()} {url} respondeu {response.status_code}: {body[:300]!r}",
+        )
+        return [query["sql"] for query in captured.captured_queries]
+
+    def test_every_route_declares_a_budget(self):
+        routes = set(_route_names(todos_urls.urlpatterns)) - UNBUDGETED_ROUTES
+        self.assertEqual(routes - set(QUERY_BUDGETS), set(), "Rotas sem orçamento de consultas.")
+
+    def test_query_counts_are_constant_and_within_budget(self):
+        for route, budgets in QUERY_BUDGETS.items():
+            for method, budget in budgets:
+                with self.subTest(route=route, method=method):
+                    counts = {}
+                    for size in DATASET_SIZES:
+                        sql = self._measure(route, method, size)
+                        counts[size] = len(sql)
+                    report = "\n".join(f"  {query}" for query in sql)
+                    self.assertEqual(
+                        len(set(counts.values())),
+                        1,
+                        f"{method.upper()} {route}: consultas crescem com o volume {counts}.\n"
+                        f"SQL com {DATASET_SIZES[-1]} tarefas:\n{report}",
+                    )
+                    self.assertLessEqual(
+                        counts[DATASET_SIZES[-1]],
+                        budget,
+                        f"{method.upper()} {route}: {counts[DATASET_SIZES[-1]]} consultas, "
+                        f"orçamento {budget}.\nSQL:\n{report}",
+                    )
+                    mail.outbox.clear()
+
+
+class SeedingTests(TestCase):
+    def test_creates_users_tasks_and_checklists(self):
+        users = bulk_seed(users=2, tasks_per_user=3, checklist_per_task=2, tags_per_task=1, prefix="seed")
+        self.assertEqual([user.username for user in users], ["seed_0", "seed_1"])
+        self.assertTrue(self.client.login(username="seed_0", password=DEFAULT_PASSWORD))
+        self.assertEqual(Task.objects.filter(owner__in=users).count(), 6)
+        self.assertEqual(TaskChecklistItem.objects.filter(task__owner__in=users).count(), 12)
+        self.assertTrue(all(len(tags) == 1 for tags in Task.objects.values_list("tags", flat=True)))
+
+    def test_seeding_again_after_a_deletion_skips_used_names(self):
+        first = bulk_seed(users=3, tasks_per_user=1, prefix="seed")
+        delete_account(first[0])
+
+        again = bulk_seed(users=2, tasks_per_user=1, prefix="seed")
+        self.assertEqual([user.username for user in again], ["seed_3", "seed_4"])
+        self.assertEqual(Task.objects.filter(owner__in=again).count(), 2)
+
+
+class FastJSONTests(TestCase):
+    def test_renderer_output_matches_drf(self):
+        user = bulk_seed(users=1, tasks_per_user=5, checklist_per_task=2, tags_per_task=2, prefix="json")[0]
+        tasks = Task.objects.filter(owner=user).prefetch_related("checklist_items")
+        samples = [
+            TaskSerializer(tasks, many=True).data,
+            {
+                "texto": "ação \u2028 linha \u2029 fim",
+                "quando": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+                "dia": date(2026, 1, 2),
+                "valor": Decimal("1.50"),
+                "preguicoso": gettext_lazy("Tarefa"),
+                1: [None, True, 1.5],
+            },
+            [2**70],
+        ]
+        for data in samples:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        context = {"indent": 2}
+        self.assertEqual(
+            FastJSONRenderer().render(samples[1], renderer_context=context),
+            JSONRenderer().render(samples[1], renderer_context=context),
+        )
+
+    def test_parser_matches_drf(self):
+        body = json.dumps({"title": "ação", "tags": ["Casa"], "n": 1.5}).encode()
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body))
+        )
+        for invalid in (b"{", b'{"n": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(BytesIO(invalid))
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        user = bulk_seed(users=1, tasks_per_user=30, checklist_per_task=2, prefix="gz")[0]
+        token = RefreshToken.for_user(user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_negotiation_respects_q_and_preference(self):
+        self.assertEqual(negotiate("gzip, deflate", ["zstd", "br", "gzip"]), "gzip")
+        self.assertEqual(negotiate("gzip;q=0", ["gzip"]), None)
+        self.assertEqual(negotiate("*", ["gzip"]), "gzip")
+        self.assertEqual(negotiate("identity", ["gzip"]), None)
+
+    def test_large_json_is_gzipped(self):
+        plain = self.client.get("/api/tasks/", **self.auth)
+        response = self.client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip", **self.auth)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_streaming_export_is_gzipped(self):
+        plain = b"".join(self.client.get("/api/tasks/export/", **self.auth).streaming_content)
+        response = self.client.get("/api/tasks/export/", HTTP_ACCEPT_ENCODING="gzip", **self.auth)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    def test_streamed_chunks_are_flushed_one_by_one(self):
+        chunks = [b'{"id": 1}\n', b'{"id": 2}\n']
+        decompressor = zlib.decompressobj(31)
+        # Cada bloco comprimido já descomprime sozinho, antes do fim do stream.
+        for chunk, compressed in zip(chunks, compress_chunks("gzip", 6, iter(chunks))):
+            self.assertEqual(decompressor.decompress(compressed), chunk)
+
+    @override_settings(TASK_EVENTS_MAX_SECONDS=0.01)
+    def test_event_stream_is_not_encoded(self):
+        response = self.client.get("/api/tasks/events/", HTTP_ACCEPT_ENCODING="gzip", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn(b"retry:", _body(response))
+
+    def test_small_bodies_are_not_compressed(self):
+        response = self.client.get("/api/health/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class WarmupTests(TestCase):
+    def test_warmup_runs_every_step(self):
+        with self.assertNoLogs("todos.warmup", level="ERROR"):
+            timings = warmup()
+        self.assertEqual(
+            set(timings), {"urls", "drf", "serializers", "hashers", "database", "caches"}
+        )
+        self.assertNotIn("database", warmup(connect=False))
+
+    def test_parse_importtime(self):
+        lines = [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   django.utils",
+            "import time:      3000 |       3120 | django",
+            "outra linha",
+        ]
+        self.assertEqual(
+            parse_importtime(lines),
+            [
+                {"module": "django.utils", "depth": 1, "self_us": 120, "cumulative_us": 120},
+                {"module": "django", "depth": 0, "self_us": 3000, "cumulative_us": 3120},
+            ],
+        )
+
+
+class PasswordPolicyTests(TestCase):
+    def test_reports_rules_in_order(self):
+        policy = get_policy()
+        self.assertEqual(policy.errors(NEW_PASSWORD), [])
+        self.assertEqual(
+            policy.errors("abc"),
+            [
+                "A senha deve ter pelo menos 8 caracteres.",
+                "A senha deve conter pelo menos uma letra maiúscula.",
+                "A senha deve conter pelo menos um número.",
+                "A senha deve conter pelo menos um símbolo.",
+            ],
+        )
+        # Fora de A-Z/a-z/0-9 conta como símbolo, como nas regex antigas.
+        self.assertTrue(policy.is_valid("Senhaç12"))
+
+    @override_settings(PASSWORD_POLICY={"MIN_LENGTH": 4, "REQUIRE_SYMBOL": False})
+    def test_policy_comes_from_settings(self):
+        policy = get_policy()
+        self.assertTrue(policy.is_valid("Abc1"))
+        self.assertEqual(
+            policy.summary, "A senha deve ter 4+ caracteres, com maiúscula, minúscula e número."
+        )
+
+    def test_uniqueness_is_checked_in_one_query(self):
+        user = bulk_seed(users=1, tasks_per_user=0, prefix="dup")[0]
+        serializer = RegisterSerializer(
+            data={
+                "username": user.username.upper(),
+                "email": user.email.upper(),
+                "password": NEW_PASSWORD,
+                "confirm_password": NEW_PASSWORD,
+            }
+        )
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {"username", "email"})
+
+    def test_taken_username_is_reported_with_field_errors(self):
+        user = bulk_seed(users=1, tasks_per_user=0, prefix="dup")[0]
+        # Várias contas com o mesmo e-mail não escondem o usuário repetido.
+        bulk_seed(users=2, tasks_per_user=0, prefix="outra")
+        User.objects.filter(username__startswith="outra_").update(email="comum@datacake.local")
+        serializer = RegisterSerializer(
+            data={
+                "username": user.username,
+                "email": "comum@datacake.local",
+                "password": "fraca",
+                "confirm_password": "fraca",
+            }
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {"username", "email", "password"})
+        self.assertEqual(serializer.errors["username"], ["Esse usuário já existe, insira um usuário válido."])
+
+        serializer = RegisterSerializer(
+            data={"username": "x", "email": "livre@datacake.local", "password": NEW_PASSWORD, "confirm_password": "y"}
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {"username"})
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.user = bulk_seed(users=1, tasks_per_user=3, checklist_per_task=1, prefix="prof")[0]
+        self.auth = {
+            "HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        }
+
+    def _profiled(self, **settings):
+        return override_settings(
+            PROFILING_ENABLED=True, PROFILING_DIR=str(self.directory), **settings
+        )
+
+    def test_header_requires_staff(self):
+        with self._profiled():
+            self.client.get("/api/tasks/", HTTP_X_PROFILE="1", **self.auth)
+            self.assertEqual(list(self.directory.iterdir()), [])
+
+            self.user.is_staff = True
+            self.user.save(update_fields=["is_staff"])
+            self.client.get("/api/tasks/", HTTP_X_PROFILE="1", **self.auth)
+
+        (meta_file,) = self.directory.glob("*.json")
+        meta = json.loads(meta_file.read_text())
+        self.assertEqual(meta["route"], "task-list")
+        self.assertEqual(meta["trigger"], "header")
+        self.assertEqual(meta["dataset"], {"tasks": 3, "checklist_items": 3})
+        self.assertTrue((self.directory / meta["file"]).name.endswith(".prof"))
+
+        out = StringIO()
+        call_command("profile_summary", dir=str(self.directory), stdout=out)
+        self.assertIn("GET task-list", out.getvalue())
+
+    def test_sample_rate_with_stack_sampler(self):
+        with self._profiled(PROFILING_SAMPLE_RATE=1.0, PROFILING_MODE="sample"):
+            self.client.get("/api/tasks/", **self.auth)
+            self.client.get("/api/health/")
+        (meta_file,) = self.directory.glob("*.json")
+        meta = json.loads(meta_file.read_text())
+        self.assertEqual((meta["trigger"], meta["mode"]), ("sample_rate", "sample"))
+        self.assertTrue(meta["file"].endswith(".stacks"))
+
+
+REPLICA_CACHE_DIR = Path(tempfile.gettempdir()) / "todos-test-replica-cache"
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica"],
+    REPLICA_PIN_SECONDS=60,
+    # Compartilhado entre processos da mesma máquina, como exigido com réplicas.
+    CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(REPLICA_CACHE_DIR),
+    }},
+)
+class ReplicaRoutingTests(TestCase):
+    """Primário e réplica em dois arquivos SQLite; a réplica não recebe as escritas."""
+
+    # "__all__" é resolvido no setUpClass, depois que o alias "replica" existe.
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls._replica_dir = tempfile.mkdtemp()
+        connections.settings["replica"] = {
+            **connections.settings["default"],
+            "NAME": str(Path(cls._replica_dir) / "replica.sqlite3"),
+        }
+        call_command("migrate", database="replica", verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        shutil.rmtree(cls._replica_dir, True)
+        shutil.rmtree(REPLICA_CACHE_DIR, True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = bulk_seed(users=1, tasks_per_user=2, prefix="primary")[0]
+        # "Atraso de replicação": mesmo usuário, dados diferentes.
+        replica_user = User.objects.using("replica").create(
+            id=self.user.id,
+            username=self.user.username,
+            email="replica@datacake.local",
+            password=self.user.password,
+            is_active=True,
+        )
+        Task.objects.using("replica").create(owner=replica_user, title="Da réplica")
+        self.auth = {
+            "HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        }
+
+    def _titles(self):
+        response = self.client.get("/api/tasks/?fields=title", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return [task["title"] for task in response.json()]
+
+    def test_reads_go_to_replica_and_writes_pin_primary(self):
+        self.assertEqual(self._titles(), ["Da réplica"])
+        self.assertEqual(
+            self.client.get("/api/auth/me/", **self.auth).json()["email"], "replica@datacake.local"
+        )
+        self.assertIsNone(current_read_alias())
+
+        response = self.client.post("/api/tasks/", {"title": "Nova"}, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Task.objects.using("replica").filter(title="Nova").exists())
+        # Logo após escrever, o usuário lê do primário e vê a própria tarefa.
+        self.assertIn("Nova", self._titles())
+        self.assertEqual(self.client.get("/api/auth/me/", **self.auth).json()["email"], self.user.email)
+
+    def test_process_local_cache_keeps_reads_on_primary(self):
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+            self.assertNotIn("Da réplica", self._titles())
+
+    def test_settings_refuse_replicas_with_local_cache(self):
+        env = {"DATABASE_REPLICA_PATHS": "/tmp/replica.sqlite3", "CACHE_BACKEND": ""}
+        with mock.patch.dict(os.environ, env), self.assertRaises(ImproperlyConfigured):
+            importlib.reload(server_settings)
+        importlib.reload(server_settings)
+
+    def test_export_streams_from_replica(self):
+        response = self.client.get("/api/tasks/export/", **self.auth)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Da réplica"])
+
+
+@override_settings(TASK_EVENTS_MAX_SECONDS=0.01)
+class TaskEventsTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=1, prefix="sse")[0]
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}
+
+    def _events(self, url="/api/tasks/events/", **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache, no-transform")
+        blocks = _body(response).decode().strip().split("\n\n")
+        self.assertTrue(blocks[0].startswith("retry: "))
+        return [dict(line.split(": ", 1) for line in block.splitlines()) for block in blocks[1:]]
+
+    def test_writes_are_replayed_from_last_event_id(self):
+        created = self.client.post(
+            "/api/tasks/", {"title": "Nova"}, content_type="application/json", **self.auth
+        ).json()
+        self.client.post(f"/api/tasks/{created['id']}/toggle/?minimal=1", **self.auth)
+        self.client.delete(f"/api/tasks/{created['id']}/", **self.auth)
+
+        received = self._events(HTTP_LAST_EVENT_ID="0", **self.auth)
+        self.assertEqual([event["event"] for event in received], ["created", "toggled", "deleted"])
+        self.assertEqual(json.loads(received[0]["data"])["data"]["title"], "Nova")
+
+        resumed = self._events(f"/api/tasks/events/?token={self.token}", HTTP_LAST_EVENT_ID=received[0]["id"])
+        self.assertEqual([event["event"] for event in resumed], ["toggled", "deleted"])
+        # Primeira conexão (WSGI): só o ponto de retomada, sem segurar o worker.
+        self.assertEqual(self._events(**self.auth), [{"id": received[-1]["id"]}])
+
+    @override_settings(TASK_EVENTS_MAX_SECONDS=0)
+    def test_wsgi_connection_does_not_stay_open(self):
+        events.publish(self.user.id, "created", 1, {"id": 1})
+        received = self._events(HTTP_LAST_EVENT_ID="0", **self.auth)
+        self.assertEqual([event["event"] for event in received], ["created"])
+
+    @override_settings(TASK_EVENTS_MAX_SECONDS=0.05, TASK_EVENTS_POLL_INTERVAL=0.01)
+    def test_asgi_connection_streams_live(self):
+        response = async_to_sync(AsyncClient().get)(f"/api/tasks/events/?token={self.token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertTrue(_body(response).startswith(b"retry: "))
+
+    def test_requires_valid_token(self):
+        self.assertEqual(self.client.get("/api/tasks/events/").status_code, 401)
+        self.assertEqual(self.client.get("/api/tasks/events/?token=x").status_code, 401)
+
+    @override_settings(
+        TASK_EVENTS_MAX_SECONDS=0,
+        TASK_EVENTS_HEARTBEAT_SECONDS=0.2,
+        TASK_EVENTS_BACKEND="todos.events.DatabasePollingBackend",
+        TASK_EVENTS_POLL_INTERVAL=0.02,
+    )
+    def test_live_events_and_heartbeat(self):
+        async def scenario():
+            stream = events.stream(self.user.id)
+            chunks = [await stream.__anext__()]
+            await sync_to_async(events.publish)(self.user.id, "created", 1, {"id": 1})
+            chunks.append(await stream.__anext__())
+            chunks.append(await stream.__anext__())
+            await stream.aclose()
+            return chunks
+
+        retry, event, heartbeat = async_to_sync(scenario)()
+        self.assertTrue(retry.startswith(b"retry: "))
+        self.assertIn(b"event: created", event)
+        self.assertEqual(heartbeat, b": ping\n\n")
+
+    def test_concurrent_subscribers_share_one_poller(self):
+        started = []
+
+        async def run(hub):
+            started.append(hub)
+            await asyncio.Event().wait()
+
+        async def scenario():
+            hub = events.EventHub()
+            queues = await asyncio.gather(hub.subscribe(self.user.id), hub.subscribe(self.user.id + 1))
+            await asyncio.sleep(0)
+            hub.unsubscribe(self.user.id, queues[0])
+            hub.unsubscribe(self.user.id + 1, queues[1])
+            return hub
+
+        with mock.patch.object(events.EventHub, "_run", run):
+            hub = async_to_sync(scenario)()
+        self.assertEqual(started, [hub])
+        self.assertIsNone(hub._task)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=20, checklist_per_task=2, prefix="arch")[0]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        tasks = Task.objects.filter(owner=self.user)
+        long_ago = timezone.now() - timedelta(days=200)
+        tasks.update(updated_at=long_ago)
+        first = list(tasks.values_list("id", flat=True)[:5])
+        tasks.filter(id__in=first).update(status="pendente", completed_at=None)
+        tasks.exclude(id__in=first).update(status="concluida", completed_at=long_ago)
+        self.old_done = set(tasks.filter(status="concluida").values_list("id", flat=True))
+
+    def test_moves_old_completed_tasks_in_batches(self):
+        totals = archive_tasks(90, batch_size=4)
+
+        self.assertEqual(totals["tasks"], 15)
+        self.assertEqual(totals["checklist_items"], 30)
+        self.assertEqual(totals["batches"], 4)
+        self.assertEqual(set(ArchivedTask.objects.values_list("id", flat=True)), self.old_done)
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 5)
+        self.assertFalse(TaskChecklistItem.objects.filter(task_id__in=self.old_done).exists())
+        self.assertEqual(ArchivedTaskChecklistItem.objects.count(), 30)
+        self.assertEqual(archive_tasks(90)["tasks"], 0)
+
+    def test_recent_tasks_stay(self):
+        Task.objects.filter(owner=self.user).update(completed_at=timezone.now())
+        self.assertEqual(archive_tasks(90)["tasks"], 0)
+
+    def test_toggle_restarts_the_clock(self):
+        # Editada há 200 dias e concluída agora pelo toggle: fica.
+        task = Task.objects.filter(owner=self.user, status="pendente").first()
+        response = self.client.post(f"/api/tasks/{task.id}/toggle/", **self.auth)
+        self.assertEqual(response.json()["status"], "concluida")
+        task.refresh_from_db()
+        self.assertLess(timezone.now() - task.completed_at, timedelta(minutes=1))
+        self.assertEqual(archive_tasks(90)["tasks"], 15)
+        self.assertTrue(Task.objects.filter(pk=task.pk).exists())
+
+        self.client.post(f"/api/tasks/{task.id}/toggle/", **self.auth)
+        task.refresh_from_db()
+        self.assertIsNone(task.completed_at)
+
+        # A edição comum (save) também registra a conclusão.
+        self.client.patch(
+            f"/api/tasks/{task.id}/", {"status": "concluida"}, content_type="application/json", **self.auth
+        )
+        task.refresh_from_db()
+        self.assertIsNotNone(task.completed_at)
+
+    def test_list_reads_active_or_archived(self):
+        call_command("archive_tasks", "--days", "90", stdout=StringIO())
+
+        active = self.client.get("/api/tasks/", **self.auth).json()
+        archived = self.client.get("/api/tasks/?archived=1", **self.auth).json()
+        self.assertEqual(len(active), 5)
+        self.assertEqual({task["id"] for task in archived}, self.old_done)
+        self.assertIn("archived_at", archived[0])
+        self.assertEqual(len(archived[0]["checklist_items"]), 2)
+
+    def _exported(self, query=""):
+        response = self.client.get(f"/api/tasks/export/{query}", **self.auth)
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_export_includes_archived_tasks(self):
+        archive_tasks(90)
+
+        rows = self._exported()
+        self.assertEqual(len(rows), 20)
+        archived = [row for row in rows if "archived_at" in row]
+        self.assertEqual({row["id"] for row in archived}, self.old_done)
+        self.assertEqual(rows[-len(archived):], archived)
+        self.assertEqual(len(archived[0]["checklist_items"]), 2)
+
+        self.assertEqual({row["id"] for row in self._exported("?archived=1")}, self.old_done)
+        self.assertEqual(len(self._exported("?archived=0")), 5)
+        as_json = self.client.get("/api/tasks/export/?output=json", **self.auth)
+        self.assertEqual(len(json.loads(b"".join(as_json.streaming_content))), 20)
+
+
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        self.user, self.other = bulk_seed(users=2, tasks_per_user=12, checklist_per_task=2, prefix="del")
+        tasks = Task.objects.filter(owner=self.user)
+        tasks.update(status="pendente", completed_at=None)
+        tasks.filter(id__in=list(tasks.values_list("id", flat=True)[:4])).update(
+            status="concluida", completed_at=timezone.now() - timedelta(days=200)
+        )
+        archive_tasks(90, owner=self.user)
+        for user in (self.user, self.other):
+            events.publish(user.id, "created", 1, {"id": 1})
+            EmailVerificationCode.objects.create(user=user, code="123456")
+
+    def _owned(self, user):
+        return {
+            "tasks": Task.objects.filter(owner=user).count(),
+            "checklist_items": TaskChecklistItem.objects.filter(task__owner=user).count(),
+            "archived_tasks": ArchivedTask.objects.filter(owner=user).count(),
+            "archived_checklist_items": ArchivedTaskChecklistItem.objects.filter(task__owner=user).count(),
+            "task_events": TaskEvent.objects.filter(owner=user).count(),
+            "verification_codes": EmailVerificationCode.objects.filter(user=user).count(),
+        }
+
+    def test_deletes_every_table_in_batches(self):
+        before, other_before = self._owned(self.user), self._owned(self.other)
+        self.assertEqual(before["archived_tasks"], 4)
+
+        totals = delete_account(self.user, batch_size=5)
+
+        self.assertEqual({name: totals[name] for name in before}, before)
+        # 16 itens de checklist em lotes de 5 = 4 lotes (o último parcial).
+        self.assertEqual(totals["batches"], 2 + 1 + 4 + 2 + 1 + 1 + 1)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(set(self._owned(self.user).values()), {0})
+        self.assertEqual(self._owned(self.other), other_before)
+
+    def test_endpoint_requires_password(self):
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        wrong = self.client.delete("/api/auth/me/", {"password": "errada"}, content_type="application/json", **auth)
+        self.assertEqual(wrong.status_code, 400)
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+        response = self.client.delete(
+            "/api/auth/me/", {"password": DEFAULT_PASSWORD}, content_type="application/json", **auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["deleted"]["tasks"], 8)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_command_reports_progress(self):
+        out = StringIO()
+        call_command("delete_account", self.user.email, "--batch-size", "3", stdout=out)
+        self.assertIn("tasks: 3", out.getvalue())
+        self.assertIn("16 checklist_items, 8 tasks", out.getvalue())
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+
+class LoggingPipelineTests(TestCase):
+    def _record(self, msg="Handled error %s", *args, level=logging.WARNING, **extra):
+        record = logging.makeLogRecord({"name": "todos", "levelno": level, "levelname": logging.getLevelName(level),
+                                        "msg": msg, "args": args})
+        record.__dict__.update(extra)
+        return record
+
+    def test_background_handler_writes_json_off_thread(self):
+        stream = StringIO()
+        handler = BackgroundStreamHandler(stream=stream, queue_size=10)
+        handler.setFormatter(JSONFormatter())
+        try:
+            handler.handle(self._record("Login OK username=%s", "demo", level=logging.INFO, route="me"))
+            handler.flush()
+        finally:
+            handler.close()
+        line = json.loads(stream.getvalue())
+        self.assertEqual(line["message"], "Login OK username=demo")
+        self.assertEqual((line["level"], line["route"]), ("INFO", "me"))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = BackgroundStreamHandler(stream=StringIO(), queue_size=1)
+        handler.listener.stop()
+        for _ in range(3):
+            handler.handle(self._record())
+        handler.close()
+        self.assertEqual(handler.dropped, 2)
+
+    def test_sampling_per_route_and_status(self):
+        sampler = SamplingFilter(burst=2, window=60)
+        passed = [sampler.filter(self._record(route="task-list", status_code=400)) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(sampler.filter(self._record(route="task-list", status_code=404)))
+        self.assertTrue(sampler.filter(self._record(route="me", status_code=400)))
+        self.assertTrue(sampler.filter(self._record(level=logging.ERROR, route="task-list", status_code=400)))
+
+        sampler.window = 0
+        record = self._record(route="task-list", status_code=400)
+        self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_exception_handler_defers_full_path(self):
+        user = bulk_seed(users=1, tasks_per_user=1, prefix="logs")[0]
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+        with self.assertLogs("todos.exceptions", "WARNING") as logs:
+            self.client.post("/api/tasks/?x=1", {}, content_type="application/json", **auth)
+        record = logs.records[0]
+        self.assertEqual((record.route, record.status_code), ("task-list", 400))
+        self.assertNotIsInstance(record.args[2], str)
+        self.assertIn("/api/tasks/?x=1", record.getMessage())
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=1, prefix="idem")[0]
+        self.task = Task.objects.get(owner=self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def _post(self, url, data=None, key="chave-1"):
+        return self.client.post(url, data, content_type="application/json", HTTP_IDEMPOTENCY_KEY=key, **self.auth)
+
+    def test_retried_create_replays_stored_response(self):
+        first = self._post("/api/tasks/", {"title": "Nova"})
+        events_after_first = TaskEvent.objects.count()
+        # Usuário, INSERT recusado (com savepoint) e a leitura da resposta guardada.
+        with self.assertNumQueries(6):
+            retry = self._post("/api/tasks/", {"title": "Nova"})
+
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Task.objects.filter(owner=self.user, title="Nova").count(), 1)
+        self.assertEqual(TaskEvent.objects.count(), events_after_first)
+
+    def test_retried_toggle_flips_once(self):
+        url = f"/api/tasks/{self.task.id}/toggle/"
+        statuses = [self._post(url).json()["status"] for _ in range(3)]
+        self.assertEqual(len(set(statuses)), 1)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, statuses[0])
+
+    def test_conflicts(self):
+        self._post("/api/tasks/", {"title": "Nova"})
+        self.assertEqual(self._post("/api/tasks/", {"title": "Outra"}).status_code, 422)
+        self.assertEqual(self._post(f"/api/tasks/{self.task.id}/toggle/").status_code, 422)
+
+        IdempotencyKey.objects.create(owner=self.user, key="pendente", fingerprint="x")
+        busy = self._post("/api/tasks/", {"title": "Nova"}, key="pendente")
+        self.assertEqual(busy.status_code, 409)
+        self.assertEqual(busy["Retry-After"], "1")
+
+    def test_errors_and_expired_keys_run_again(self):
+        self.assertEqual(self._post("/api/tasks/", {"title": ""}).status_code, 400)
+        self.assertEqual(self._post("/api/tasks/", {"title": "Válida"}).status_code, 201)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(hours=48))
+        self.assertEqual(self._post("/api/tasks/", {"title": "Válida"}).status_code, 201)
+        self.assertEqual(Task.objects.filter(owner=self.user, title="Válida").count(), 2)
+
+        call_command("prune_idempotency_keys", stdout=StringIO())
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_abandoned_in_progress_key_is_reclaimed(self):
+        # Worker morto no meio da requisição: a linha "em andamento" fica para trás.
+        IdempotencyKey.objects.create(owner=self.user, key="orfa", fingerprint="x")
+        self.assertEqual(self._post("/api/tasks/", {"title": "Nova"}, key="orfa").status_code, 409)
+
+        IdempotencyKey.objects.filter(key="orfa").update(
+            created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS + 1)
+        )
+        self.assertEqual(self._post("/api/tasks/", {"title": "Nova"}, key="orfa").status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get(key="orfa").status_code, 201)
+
+    def test_without_header_nothing_is_stored(self):
+        self.client.post("/api/tasks/", {"title": "Nova"}, content_type="application/json", **self.auth)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class CalendarTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=0, prefix="cal")[0]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        rows = [
+            ("pendente", "alta", date(2026, 3, 2)),
+            ("pendente", "baixa", date(2026, 3, 2)),
+            ("concluida", "alta", date(2026, 3, 2)),
+            ("pendente", "media", date(2026, 3, 31)),
+            ("pendente", "media", date(2026, 4, 1)),
+            ("pendente", "media", None),
+        ]
+        Task.objects.bulk_create(
+            Task(owner=self.user, title="T", status=state, importance=importance, due_date=due)
+            for state, importance, due in rows
+        )
+
+    def test_counts_per_day(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/tasks/calendar/?month=2026-03", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["month"], "2026-03")
+        self.assertEqual([day["date"] for day in body["days"]], ["2026-03-02", "2026-03-31"])
+        first = body["days"][0]
+        self.assertEqual(first["total"], 3)
+        self.assertEqual(first["status"], {"pendente": 2, "concluida": 1})
+        self.assertEqual(first["importance"], {"baixa": 1, "media": 0, "alta": 2})
+        self.assertEqual(first["overdue"], 2)
+
+    def test_filters_and_invalid_month(self):
+        body = self.client.get("/api/tasks/calendar/?month=2026-03&importance=alta", **self.auth).json()
+        self.assertEqual([day["total"] for day in body["days"]], [2])
+        self.assertEqual(self.client.get("/api/tasks/calendar/?month=março", **self.auth).status_code, 400)
+
+
+class OrderingTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=30, prefix="ord")[0]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def _list(self, ordering):
+        return self.client.get(f"/api/tasks/?compact=1&ordering={ordering}", **self.auth).json()
+
+    def test_importance_rank_stays_in_sync(self):
+        ranks = Task.IMPORTANCE_RANKS
+        for importance, rank in Task.objects.values_list("importance", "importance_rank"):
+            self.assertEqual(rank, ranks[importance])
+
+        task = Task.objects.filter(owner=self.user).first()
+        task.importance = "alta"
+        task.save(update_fields=["importance"])
+        self.assertEqual(Task.objects.get(pk=task.pk).importance_rank, 2)
+
+        self.client.patch(f"/api/tasks/{task.id}/", {"importance": "baixa"},
+                          content_type="application/json", **self.auth)
+        self.assertEqual(Task.objects.get(pk=task.pk).importance_rank, 0)
+
+        self.client.post("/api/tasks/import/", b'{"title": "Importada", "importance": "alta"}\n',
+                         content_type="application/x-ndjson", **self.auth)
+        self.assertEqual(Task.objects.get(title="Importada").importance_rank, 2)
+
+    def test_orderings(self):
+        by_importance = [task["importance"] for task in self._list("-importance")]
+        self.assertEqual(by_importance, sorted(by_importance, key=Task.IMPORTANCE_RANKS.get, reverse=True))
+
+        due = [task["due_date"] for task in self._list("due_date")]
+        dated = [value for value in due if value is not None]
+        self.assertEqual(due, sorted(dated) + [None] * (len(due) - len(dated)))
+        due_desc = [task["due_date"] for task in self._list("-due_date")]
+        self.assertEqual(due_desc, sorted(dated, reverse=True) + [None] * (len(due) - len(dated)))
+
+        statuses = [task["status"] for task in self._list("-status")]
+        self.assertEqual(statuses, sorted(statuses, reverse=True))
+        self.assertEqual(self._list("bogus"), self._list("-created_at"))
+
+    def test_every_ordering_is_served_by_an_index(self):
+        for name, ordering in TASK_ORDERINGS.items():
+            with self.subTest(ordering=name):
+                queryset = Task.objects.filter(owner=self.user).order_by(*ordering)
+                sql, params = queryset.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                    plan = " / ".join(row[-1] for row in cursor.fetchall())
+                self.assertIn("USING INDEX task_owner_", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user, self.other = bulk_seed(users=2, tasks_per_user=5, checklist_per_task=2, prefix="exp")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def _export(self, query=""):
+        response = self.client.get(f"/api/tasks/export/{query}", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    @mock.patch("todos.views.EXPORT_CHUNK_SIZE", 2)
+    def test_ndjson_and_json_carry_the_same_rows(self):
+        response, body = self._export()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="tarefas.ndjson"')
+        rows = [json.loads(line) for line in body.splitlines()]
+
+        expected = Task.objects.filter(owner=self.user).order_by("-created_at", "-id")
+        self.assertEqual([row["id"] for row in rows], list(expected.values_list("id", flat=True)))
+        first = rows[0]
+        self.assertEqual(
+            set(first), set(TaskSerializer.Meta.fields) - set(TaskSerializer.OPTIONAL_FIELDS)
+        )
+        items = TaskChecklistItem.objects.filter(task_id=first["id"]).order_by("order", "id")
+        self.assertEqual([item["label"] for item in first["checklist_items"]],
+                         list(items.values_list("label", flat=True)))
+
+        response, body = self._export("?output=json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(body), rows)
+
+    def test_filters_ordering_and_invalid_output(self):
+        Task.objects.filter(owner=self.user).update(status="pendente")
+        Task.objects.filter(pk=Task.objects.filter(owner=self.user).first().pk).update(status="concluida")
+        _, body = self._export("?status=concluida")
+        self.assertEqual(len(body.splitlines()), 1)
+
+        _, body = self._export("?ordering=created_at")
+        ids = [json.loads(line)["id"] for line in body.splitlines()]
+        expected = Task.objects.filter(owner=self.user).order_by("created_at", "id")
+        self.assertEqual(ids, list(expected.values_list("id", flat=True)))
+
+        self.assertEqual(self.client.get("/api/tasks/export/?output=xml", **self.auth).status_code, 400)
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=0, prefix="imp")[0]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def _import(self, body, content_type="application/x-ndjson", query=""):
+        response = self.client.post(f"/api/tasks/import/{query}", body, content_type=content_type, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ndjson_reports_invalid_rows_and_keeps_the_rest(self):
+        body = "\n".join([
+            '{"title": "Primeira", "tags": ["casa"], "checklist_items": ["a", {"label": "b", "done": true}]}',
+            '{"title": ""}',
+            "não é json",
+            "",
+            '["lista"]',
+            '{"title": "Segunda", "importance": "urgente", "due_date": "amanhã"}',
+            '{"title": "Terceira", "status": "concluida", "due_date": "2026-05-01"}',
+        ]).encode()
+        report = self._import(body)
+
+        self.assertEqual((report["created"], report["failed"], report["errors_truncated"]), (2, 4, False))
+        self.assertEqual([error["line"] for error in report["errors"]], [2, 3, 5, 6])
+        self.assertIn("title", report["errors"][0]["errors"])
+        self.assertEqual(set(report["errors"][3]["errors"]), {"importance", "due_date"})
+
+        first = Task.objects.get(owner=self.user, title="Primeira")
+        self.assertEqual((first.tags, first.status, first.importance), (["Casa"], "pendente", "media"))
+        self.assertEqual(
+            list(first.checklist_items.values_list("label", "done", "order")),
+            [("a", False, 0), ("b", True, 1)],
+        )
+        third = Task.objects.get(owner=self.user, title="Terceira")
+        self.assertEqual((third.status, third.due_date), ("concluida", date(2026, 5, 1)))
+
+    def test_csv_upload_and_command(self):
+        csv_body = (
+            "title,description,status,importance,category,tags,due_date,checklist\n"
+            "Pelo CSV,,,alta,trabalho,Trabalho|Estudos,2026-06-01,um|dois\n"
+            ",sem título,,,,,,\n"
+        ).encode()
+        upload = SimpleUploadedFile("tarefas.csv", csv_body, content_type="text/csv")
+        response = self.client.post("/api/tasks/import/", {"file": upload}, **self.auth)
+        report = response.json()
+        self.assertEqual((report["created"], report["failed"]), (1, 1))
+        self.assertEqual(report["errors"][0]["line"], 3)
+        task = Task.objects.get(owner=self.user, title="Pelo CSV")
+        self.assertEqual((task.importance, task.category, task.tags), ("alta", "trabalho", ["Trabalho", "Estudos"]))
+        self.assertEqual(list(task.checklist_items.values_list("label", flat=True)), ["um", "dois"])
+
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = directory / "tarefas.ndjson"
+        path.write_bytes(b'{"title": "Pelo comando"}\n{"title": ""}\n')
+        out, err = StringIO(), StringIO()
+        call_command("import_tasks", str(path), user=self.user.email, stdout=out, stderr=err)
+        self.assertIn("1 tarefas importadas, 1 linhas com erro.", out.getvalue())
+        self.assertIn("linha 2:", err.getvalue())
+        self.assertTrue(Task.objects.filter(owner=self.user, title="Pelo comando").exists())
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.post("/api/tasks/import/", b"x", content_type="text/plain", **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(owner=self.user).exists())
+
+
+class FieldSelectionTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=3, checklist_per_task=2, prefix="proj")[0]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        self.task = Task.objects.filter(owner=self.user).order_by("id").first()
+        self.task.checklist_items.filter(order=0).update(done=True)
+
+    def _get(self, query, url="/api/tasks/"):
+        response = self.client.get(f"{url}?{query}", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_fields_and_omit(self):
+        # Sem checklist_items não há o prefetch do checklist: usuário + tarefas.
+        with self.assertNumQueries(2):
+            rows = self._get("fields=title,status")
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({tuple(sorted(row)) for row in rows}, {("id", "status", "title")})
+
+        row = self._get("omit=description,checklist_items", url=f"/api/tasks/{self.task.id}/")
+        self.assertEqual(
+            set(row),
+            set(TaskSerializer.Meta.fields) - set(TaskSerializer.OPTIONAL_FIELDS) - {"description", "checklist_items"},
+        )
+        self.assertEqual(row["title"], self.task.title)
+
+    def test_compact_and_counts(self):
+        rows = self._get("compact=1")
+        self.assertEqual(set(rows[0]), set(COMPACT_TASK_FIELDS))
+
+        rows = {row["id"]: row for row in self._get("fields=checklist_total,checklist_done")}
+        self.assertEqual(rows[self.task.id], {"id": self.task.id, "checklist_total": 2, "checklist_done": 1})
+
+    def test_unknown_names_are_ignored(self):
+        rows = self._get("fields=title,owner,senha")
+        self.assertEqual(set(rows[0]), {"id", "title"})
+        self.assertEqual(set(self._get("fields=nada")[0]), {"id"})
+
+
+class ReadinessTests(TestCase):
+    def setUp(self):
+        health.reset()
+        self.addCleanup(health.reset)
+
+    def test_reports_each_check_and_caches(self):
+        with self.assertNumQueries(4):
+            first = self.client.get("/api/health/ready/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["X-Health-Cached"], "0")
+        body = first.json()
+        self.assertEqual(
+            set(body["checks"]), {"database:default", "cache", "migrations:default", "queues", "housekeeping"}
+        )
+        self.assertEqual(body["degraded"], [])
+        self.assertTrue(all("latency_ms" in check for check in body["checks"].values()))
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/health/ready/")
+        self.assertEqual(second["X-Health-Cached"], "1")
+        self.assertEqual(second.json(), body)
+
+    @override_settings(HEALTH_READY_TTL=0, TASK_EVENTS_RETENTION_DAYS=1)
+    def test_shared_state_only_degrades(self):
+        # Limpeza atrasada é igual em todos os pods: não tira ninguém do balanceador.
+        user = bulk_seed(users=1, tasks_per_user=0, prefix="ready")[0]
+        events.publish(user.id, "created", 1, {})
+        TaskEvent.objects.update(created_at=timezone.now() - timedelta(days=5))
+
+        response = self.client.get("/api/health/ready/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["degraded"], ["housekeeping"])
+        self.assertEqual(response.json()["checks"]["housekeeping"]["status"], "fail")
+
+    @override_settings(HEALTH_READY_TTL=0)
+    def test_migrations_are_read_until_clean(self):
+        self.client.get("/api/health/ready/")
+        # Já sem pendências: o recálculo não volta a ler django_migrations.
+        with self.assertNumQueries(2):
+            body = self.client.get("/api/health/ready/").json()
+        self.assertEqual(body["checks"]["migrations:default"], {"status": "ok", "pending": [], "latency_ms": mock.ANY})
+
+        health.reset()
+        MigrationRecorder(connection).migration_qs.filter(app="todos", name="0013_task_completed_at").delete()
+        body = self.client.get("/api/health/ready/").json()
+        self.assertEqual(body["checks"]["migrations:default"]["pending"], ["todos.0013_task_completed_at"])
+        self.assertEqual(body["status"], "fail")
+
+    @override_settings(HEALTH_READY_TTL=0)
+    def test_unbounded_log_queue_never_fills(self):
+        handler = BackgroundStreamHandler(stream=StringIO(), queue_size=0)
+        self.addCleanup(handler.close)
+        body = self.client.get("/api/health/ready/").json()
+        self.assertEqual(body["checks"]["queues"]["status"], "ok")
+
+    @override_settings(HEALTH_READY_TTL=0)
+    def test_critical_failure_returns_503(self):
+        with mock.patch.object(health, "_cache", side_effect=RuntimeError("cache fora")):
+            response = self.client.get("/api/health/ready/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["checks"]["cache"]["status"], "fail")
+        self.assertEqual(response.json()["checks"]["database:default"]["status"], "ok")
+
+
+class LeanMiddlewareTests(TestCase):
+    def _session_attached(self, path):
+        request = RequestFactory().get(path)
+        SessionMiddleware(lambda request: HttpResponse())(request)
+        return hasattr(request, "session")
+
+    def test_api_paths_skip_session_csrf_and_auth(self):
+        self.assertFalse(self._session_attached("/api/tasks/"))
+        self.assertTrue(self._session_attached("/admin/"))
+        with override_settings(LEAN_API_ENABLED=False):
+            self.assertTrue(self._session_attached("/api/tasks/"))
+
+        response = self.client.get("/api/health/", HTTP_COOKIE="sessionid=abc; csrftoken=def")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+
+    def test_admin_keeps_full_stack(self):
+        response = self.client.get("/admin/login/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("csrftoken", response.cookies)
+        self.assertEqual(Client(enforce_csrf_checks=True).post("/admin/login/", {}).status_code, 403)
+
+
+SHARDS = ["shard1", "shard2"]
+
+
+@override_settings(DATABASE_SHARDS=SHARDS)
+class ShardingTests(TestCase):
+    """Dois shards em arquivos SQLite próprios; usuários e auth no default."""
+
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls._shard_dir = tempfile.mkdtemp()
+        for alias in SHARDS:
+            connections.settings[alias] = {
+                **connections.settings["default"],
+                "NAME": str(Path(cls._shard_dir) / f"{alias}.sqlite3"),
+            }
+        with override_settings(DATABASE_SHARDS=SHARDS):
+            for alias in SHARDS:
+                call_command("migrate", database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        shutil.rmtree(cls._shard_dir, True)
+
+    def setUp(self):
+        self.users = bulk_seed(users=2, tasks_per_user=3, checklist_per_task=2, prefix="shard")
+
+    def _auth(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    def _ids(self, user):
+        response = self.client.get("/api/tasks/?fields=id", **self._auth(user))
+        self.assertEqual(response.status_code, 200)
+        return sorted(task["id"] for task in response.json())
+
+    def test_each_owner_lives_in_own_shard(self):
+        placed = {shards.hash_shard(user.id) for user in self.users}
+        self.assertEqual(placed, set(SHARDS))
+        self.assertFalse(Task.objects.using("default").exists())
+
+        for user in self.users:
+            alias = shards.hash_shard(user.id)
+            self.assertEqual(ShardAssignment.objects.get(owner=user).alias, alias)
+            self.assertFalse(User.objects.using(alias).get(pk=user.id).is_active)
+            response = self.client.post(
+                "/api/tasks/", TASK_PAYLOAD, content_type="application/json", **self._auth(user)
+            )
+            self.assertEqual(response.status_code, 201)
+            task = Task.objects.using(alias).get(pk=response.json()["id"])
+            self.assertGreaterEqual(task.id, (SHARDS.index(alias) + 1) * shards.SHARD_ID_SPAN)
+            self.assertEqual(task.checklist_items.count(), 2)
+            stored = Task.objects.using(alias).filter(owner=user).values_list("id", flat=True)
+            self.assertEqual(self._ids(user), sorted(stored))
+            self.assertEqual(len(stored), 4)
+
+    def test_rebalance_moves_owner_and_keeps_ids(self):
+        user = self.users[0]
+        source = shards.hash_shard(user.id)
+        target = next(alias for alias in SHARDS if alias != source)
+        ids = self._ids(user)
+
+        out = StringIO()
+        call_command("rebalance_shard", user.username, "--to", target, "--grace", "0", stdout=out)
+
+        self.assertIn("3 tasks", out.getvalue())
+        self.assertEqual(ShardAssignment.objects.get(owner=user).alias, target)
+        self.assertFalse(Task.objects.using(source).filter(owner_id=user.id).exists())
+        self.assertFalse(User.objects.using(source).filter(pk=user.id).exists())
+        self.assertEqual(TaskChecklistItem.objects.using(target).filter(task__owner_id=user.id).count(), 6)
+        self.assertEqual(self._ids(user), ids)
+
+    def test_moving_owner_gets_503(self):
+        user = self.users[0]
+        self._ids(user)
+        ShardAssignment.objects.filter(owner=user).update(moving=True)
+        self.assertEqual(self.client.get("/api/tasks/", **self._auth(user)).status_code, 503)
+
+    def test_delete_account_clears_shard(self):
+        user, other = self.users
+        alias = shards.hash_shard(user.id)
+        totals = delete_account(user)
+        self.assertEqual((totals["tasks"], totals["checklist_items"]), (3, 6))
+        self.assertFalse(Task.objects.using(alias).filter(owner_id=user.id).exists())
+        self.assertFalse(User.objects.using(alias).filter(pk=user.id).exists())
+        self.assertEqual(Task.objects.using(shards.hash_shard(other.id)).filter(owner_id=other.id).count(), 3)
+
+    def test_profile_counts_owner_shard(self):
+        user = self.users[0]
+        user.is_staff = True
+        user.save(update_fields=["is_staff"])
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory, True)
+        with override_settings(PROFILING_ENABLED=True, PROFILING_DIR=str(directory)):
+            self.client.get("/api/tasks/", HTTP_X_PROFILE="1", **self._auth(user))
+        (meta_file,) = directory.glob("*.json")
+        self.assertEqual(json.loads(meta_file.read_text())["dataset"], {"tasks": 3, "checklist_items": 6})
+
+    @override_settings(HEALTH_READY_TTL=0)
+    def test_readiness_checks_each_shard(self):
+        health.reset()
+        body = self.client.get("/api/health/ready/").json()
+        for alias in SHARDS:
+            self.assertEqual(body["checks"][f"database:{alias}"]["status"], "ok")
+            self.assertEqual(body["checks"][f"migrations:{alias}"]["pending"], [])
+
+
+class TaskToggleTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=1, checklist_per_task=2, prefix="tog")[0]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        self.task = Task.objects.get(owner=self.user)
+        Task.objects.filter(pk=self.task.pk).update(status="pendente", completed_at=None)
+        self.url = f"/api/tasks/{self.task.id}/toggle/"
+
+    def _toggle(self, query="", **extra):
+        response = self.client.post(f"{self.url}{query}", **self.auth, **extra)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _check_round_trip(self):
+        body = self._toggle()
+        self.assertEqual(body["status"], "concluida")
+        self.assertEqual(len(body["checklist_items"]), 2)
+        self.assertEqual(body["title"], self.task.title)
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual(task.status, "concluida")
+        self.assertLess(timezone.now() - task.completed_at, timedelta(minutes=1))
+
+        self.assertEqual(self._toggle()["status"], "pendente")
+        self.assertIsNone(Task.objects.get(pk=self.task.pk).completed_at)
+
+    def test_full_payload_sets_and_clears_completed_at(self):
+        self.assertTrue(supports_update_returning(connection))
+        self._check_round_trip()
+
+    def test_without_returning(self):
+        with mock.patch("todos.queries.supports_update_returning", return_value=False):
+            self._check_round_trip()
+
+    def test_minimal_payload(self):
+        # Usuário, o UPDATE ... RETURNING e o evento.
+        with self.assertNumQueries(3):
+            body = self._toggle("?minimal=1")
+        self.assertEqual(body, {"id": self.task.id, "status": "concluida"})
+        self.assertEqual(self._toggle(HTTP_PREFER="return=minimal"), {"id": self.task.id, "status": "pendente"})
+        self.assertEqual(self.client.post("/api/tasks/999999/toggle/", **self.auth).status_code, 404)
+
+
+class ChecklistTests(TestCase):
+    def setUp(self):
+        self.user, self.other = bulk_seed(users=2, tasks_per_user=1, checklist_per_task=3, prefix="lista")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        self.task = Task.objects.get(owner=self.user)
+        self.items = list(self.task.checklist_items.order_by("order", "id"))
+        self.task.checklist_items.update(done=False)
+
+    def _post(self, url, data=None):
+        return self.client.post(url, data, content_type="application/json", **self.auth)
+
+    def test_toggle_flips_done_without_touching_the_task(self):
+        item = self.items[1]
+        updated_at = Task.objects.get(pk=self.task.pk).updated_at
+        url = f"/api/tasks/{self.task.id}/checklist/{item.id}/toggle/"
+
+        response = self._post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"id": item.id, "label": item.label, "done": True, "order": item.order})
+        self.assertTrue(TaskChecklistItem.objects.get(pk=item.pk).done)
+        self.assertFalse(self._post(url).json()["done"])
+        self.assertFalse(TaskChecklistItem.objects.get(pk=item.pk).done)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).updated_at, updated_at)
+
+        other_item = TaskChecklistItem.objects.filter(task__owner=self.other).first()
+        self.assertEqual(self._post(f"/api/tasks/{self.task.id}/checklist/{other_item.id}/toggle/").status_code, 404)
+
+    def test_reorder_persists_order(self):
+        ids = [item.id for item in reversed(self.items)]
+        response = self._post(f"/api/tasks/{self.task.id}/checklist/reorder/", {"order": ids})
+        self.assertEqual(response.json(), {"updated": 3})
+        self.assertEqual(list(self.task.checklist_items.order_by("order").values_list("id", flat=True)), ids)
+        listed = self.client.get(f"/api/tasks/{self.task.id}/checklist/", **self.auth).json()
+        self.assertEqual([item["id"] for item in listed], ids)
+
+    def test_reorder_with_foreign_item_changes_nothing(self):
+        other_item = TaskChecklistItem.objects.filter(task__owner=self.other).first()
+        before = list(self.task.checklist_items.values_list("id", "order"))
+        response = self._post(
+            f"/api/tasks/{self.task.id}/checklist/reorder/", {"order": [self.items[2].id, other_item.id]}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(self.task.checklist_items.values_list("id", "order")), before)
+
+
+class ChecklistValidationTests(TestCase):
+    def setUp(self):
+        self.user = bulk_seed(users=1, tasks_per_user=1, checklist_per_task=2, prefix="chk")[0]
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        self.task = Task.objects.get(owner=self.user)
+
+    def _post(self, url, data):
+        return self.client.post(url, data, content_type="application/json", **self.auth)
+
+    def test_non_numeric_pk_is_404(self):
+        self.assertEqual(self._post("/api/tasks/abc/checklist/", {"label": "Novo"}).status_code, 404)
+        self.assertEqual(self._post("/api/tasks/abc/checklist/reorder/", {"order": [1]}).status_code, 404)
+
+    def test_reorder_rejects_booleans(self):
+        response = self._post(f"/api/tasks/{self.task.id}/checklist/reorder/", {"order": [True, False]})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkInsertTests(TestCase):
+    def test_generic_path_keeps_row_timestamps_without_touching_fields(self):
+        user = bulk_seed(users=1, tasks_per_user=0, prefix="bulk")[0]
+        long_ago = timezone.now() - timedelta(days=30)
+        row = (user.id, "Antiga", "", "concluida", "alta", "casa", [], None, "nenhuma", long_ago, long_ago)
+        # Mesmo caminho do Postgres (``_insert`` com raw=True) rodando no SQLite.
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            ids = insert_tasks([row, row])
+
+        self.assertTrue(Task._meta.get_field("updated_at").auto_now)
+        self.assertEqual(len(ids), 2)
+        for task in Task.objects.filter(id__in=ids):
+            self.assertEqual((task.created_at, task.updated_at, task.completed_at), (long_ago,) * 3)
+            self.assertEqual(task.importance_rank, 2)
+
+
+class MetricsTests(TestCase):
+    def test_unknown_methods_share_one_label(self):
+        for method in ("FOO1", "FOO2"):
+            self.client.generic(method, "/api/health/")
+        body = self.client.get("/api/metrics/").content.decode()
+        self.assertNotIn('method="FOO1"', body)
+        self.assertIn('route="health",method="other"', body)
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.1"], METRICS_TOKEN="segredo")
+    def test_requires_allowed_ip_or_token(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+        self.assertEqual(self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer errado").status_code, 403)
+        self.assertEqual(self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer segredo").status_code, 200)
+        self.assertEqual(self.client.get("/api/metrics/", REMOTE_ADDR="10.0.0.1").status_code, 200)
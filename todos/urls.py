@@ -9,6 +9,9 @@ from .views import (
     RequestPasswordResetView,
     ConfirmPasswordResetView,
     HealthView,
+    ReadinessView,
+    MetricsView,
+    TaskEventsView,
 )
 from .auth_tokens import TokenObtainPairView, TokenRefreshView, LogoutView, MeView
 
@@ -16,6 +19,8 @@ router = DefaultRouter()
 router.register(r"tasks", TaskViewSet, basename="task")
 
 urlpatterns = [
+    # Antes do router: senão "events" casaria com tasks/<pk>/.
+    path("tasks/events/", TaskEventsView.as_view(), name="task-events"),
     path("", include(router.urls)),
     path("auth/register/", RegisterView.as_view(), name="register"),
     path("auth/verify/", VerifyEmailView.as_view(), name="verify-email"),
@@ -28,4 +33,6 @@ urlpatterns = [
     path("auth/password/reset/", RequestPasswordResetView.as_view(), name="password-reset"),
     path("auth/password/confirm/", ConfirmPasswordResetView.as_view(), name="password-confirm"),
     path("health/", HealthView.as_view(), name="health"),
+    path("health/ready/", ReadinessView.as_view(), name="health-ready"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
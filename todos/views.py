@@ -1,35 +1,175 @@
 from __future__ import annotations
 
-import re
+import hmac
+from itertools import islice
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
 from django.core.mail import send_mail
+from django.db import router, transaction
+from django.db.models import Case, Count, F, Max, Q, Value, When, prefetch_related_objects
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_date
-from datetime import timedelta
+from django.views import View
+from datetime import date, timedelta
 
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.views import APIView
-
-from .models import EmailVerificationCode, Task
-from .serializers import RegisterSerializer, TaskSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import events, health, metrics
+from .idempotency import idempotent
+from .importer import IMPORT_FORMATS, detect_format, import_tasks
+from .models import ArchivedTask, EmailVerificationCode, Task, TaskChecklistItem
+from .password_policy import get_policy
+from .queries import update_returning
+from .renderers import FastJSONRenderer
+from .replicas import ReplicaReadMixin, pin_primary
+from .serializers import (
+    ArchivedTaskSerializer,
+    RegisterSerializer,
+    TaskChecklistItemSerializer,
+    TaskSerializer,
+)
+from .shards import ShardScopeMixin
 
 User = get_user_model()
 
-
-
-class TaskViewSet(viewsets.ModelViewSet):
+# ``compact=1``: só o necessário para as telas de lista do app.
+COMPACT_TASK_FIELDS = ["id", "title", "status", "importance", "due_date"]
+TASK_MODEL_FIELDS = {field.name for field in Task._meta.concrete_fields} - {"owner"}
+TASK_ATTNAMES = [field.attname for field in Task._meta.concrete_fields]
+
+# ``ordering=``: cada ordem casa com um índice (owner, ..., id) de ``Task.Meta``;
+# o id desempata no mesmo sentido. Valor desconhecido = padrão (-created_at).
+# ``NULLS LAST`` sai nativo no SQLite 3.30+, que o atende pelo índice (duas
+# faixas: datas, depois nulos); onde o Django precisa emular com ``IS NULL``
+# (SQLite antigo, MySQL), as ordens por due_date ordenam sem o índice.
+TASK_ORDERINGS = {
+    "created_at": ["created_at", "id"],
+    "-created_at": ["-created_at", "-id"],
+    "due_date": [F("due_date").asc(nulls_last=True), "id"],
+    "-due_date": [F("due_date").desc(nulls_last=True), "-id"],
+    "importance": ["importance_rank", "id"],
+    "-importance": ["-importance_rank", "-id"],
+    "status": ["status", "id"],
+    "-status": ["-status", "-id"],
+}
+
+CALENDAR_COUNTS = {
+    "pendente": Q(status="pendente"),
+    "concluida": Q(status="concluida"),
+    "baixa": Q(importance="baixa"),
+    "media": Q(importance="media"),
+    "alta": Q(importance="alta"),
+}
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_CONTENT_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def _export_chunks(sources, output: str):
+    """
+    Serializa cada ``(queryset, serializer)`` em sequência, em blocos, buscando o
+    checklist de cada bloco separadamente.
+    """
+    renderer = FastJSONRenderer()
+    first = True
+    if output == "json":
+        yield b"["
+    for queryset, serializer_class in sources:
+        rows = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        while batch := list(islice(rows, EXPORT_CHUNK_SIZE)):
+            prefetch_related_objects(batch, "checklist_items")
+            data = serializer_class(batch, many=True).data
+            if output == "ndjson":
+                yield b"".join(renderer.render(item) + b"\n" for item in data)
+            else:
+                body = b",".join(renderer.render(item) for item in data)
+                yield body if first else b"," + body
+            first = False
+    if output == "json":
+        yield b"]"
+
+
+class TaskViewSet(ShardScopeMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
-
-    def get_queryset(self):
-        queryset = (
-            Task.objects.filter(owner=self.request.user)
-            .prefetch_related("checklist_items")
-            .order_by("-created_at")
-        )
+    replica_actions = ("list", "retrieve", "export", "calendar")
+
+    def _requested_fields(self):
+        """Campos pedidos via ``fields=``/``omit=``/``compact=1`` (só em leituras)."""
+        if self.action not in ("list", "retrieve"):
+            return None
+        params = self.request.query_params
+        fields_param = params.get("fields")
+        omit_param = params.get("omit")
+        compact = params.get("compact") in ("1", "true")
+        if not (fields_param or omit_param or compact):
+            return None
+
+        available = [
+            name for name in TaskSerializer.Meta.fields
+            if name not in TaskSerializer.OPTIONAL_FIELDS
+        ]
+        if compact:
+            selected = list(COMPACT_TASK_FIELDS)
+        elif fields_param:
+            selected = [name.strip() for name in fields_param.split(",")]
+        else:
+            selected = available
+        omitted = {name.strip() for name in (omit_param or "").split(",")}
+        allowed = set(TaskSerializer.Meta.fields)
+        return ["id"] + [
+            name for name in selected
+            if name in allowed and name not in omitted and name != "id"
+        ]
+
+    def _archived_param(self):
+        """``?archived=``: ``True`` (só arquivadas), ``False`` (só ativas) ou ``None``."""
+        value = self.request.query_params.get("archived")
+        if value in ("1", "true"):
+            return True
+        if value in ("0", "false"):
+            return False
+        return None
+
+    def _archived(self):
+        return self.action == "list" and self._archived_param() is True
+
+    def get_serializer_class(self):
+        return ArchivedTaskSerializer if self._archived() else TaskSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self._requested_fields()
+        if fields is not None:
+            kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self, model=None):
+        fields = self._requested_fields()
+        # ?archived=1 lê as concluídas arquivadas (mesmos campos e filtros).
+        if model is None:
+            model = ArchivedTask if self._archived() else Task
+        ordering = TASK_ORDERINGS.get(self.request.query_params.get("ordering"), TASK_ORDERINGS["-created_at"])
+        queryset = model.objects.filter(owner=self.request.user).order_by(*ordering)
+        if fields is None or "checklist_items" in fields:
+            queryset = queryset.prefetch_related("checklist_items")
+        if fields is not None:
+            queryset = queryset.only(*(name for name in fields if name in TASK_MODEL_FIELDS))
+            if "checklist_total" in fields:
+                queryset = queryset.annotate(checklist_total=Count("checklist_items"))
+            if "checklist_done" in fields:
+                queryset = queryset.annotate(
+                    checklist_done=Count("checklist_items", filter=Q(checklist_items__done=True))
+                )
         status_param = self.request.query_params.get("status")
         if status_param in ("pendente", "concluida"):
             queryset = queryset.filter(status=status_param)
@@ -64,25 +204,228 @@ class TaskViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @idempotent
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    @idempotent
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        task = serializer.save(owner=self.request.user)
+        events.publish(task.owner_id, "created", task.id, serializer.data)
+
+    def perform_update(self, serializer):
+        task = serializer.save()
+        events.publish(task.owner_id, "updated", task.id, serializer.data)
+
+    def perform_destroy(self, instance):
+        task_id = instance.id
+        instance.delete()
+        events.publish(self.request.user.id, "deleted", task_id, {"id": task_id})
+
+    @action(detail=False, methods=["get"])
+    def calendar(self, request):
+        # Contagens por dia em um único GROUP BY due_date (índice owner, due_date);
+        # as tarefas de um dia vêm depois, da lista com due_from=due_to=<dia>.
+        month = request.query_params.get("month")
+        try:
+            first = date.fromisoformat(f"{month}-01") if month else timezone.localdate().replace(day=1)
+        except ValueError:
+            return Response(
+                {"detail": "Mês inválido. Use month=AAAA-MM."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        following = (first + timedelta(days=32)).replace(day=1)
+        today = timezone.localdate()
+
+        rows = (
+            self.get_queryset()
+            .prefetch_related(None)
+            .filter(due_date__gte=first, due_date__lt=following)
+            .order_by("due_date")
+            .values("due_date")
+            .annotate(
+                total=Count("id"),
+                overdue=Count("id", filter=Q(status="pendente", due_date__lt=today)),
+                **{name: Count("id", filter=condition) for name, condition in CALENDAR_COUNTS.items()},
+            )
+        )
+        days = [
+            {
+                "date": row["due_date"],
+                "total": row["total"],
+                "overdue": row["overdue"],
+                "status": {name: row[name] for name in ("pendente", "concluida")},
+                "importance": {name: row[name] for name in ("baixa", "media", "alta")},
+            }
+            for row in rows
+        ]
+        return Response({"month": first.strftime("%Y-%m"), "days": days}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_CONTENT_TYPES:
+            return Response(
+                {"detail": "Formato inválido. Use output=ndjson ou output=json."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-    @action(detail=True, methods=["post"])
-    def toggle(self, request, pk=None):
-        task = self.get_object()
-        new_status = "concluida" if task.status == "pendente" else "pendente"
-        task.status = new_status
+        # Por padrão, ativas e depois arquivadas; ?archived=0/1 exporta só uma das duas.
+        archived = self._archived_param()
+        sources = [
+            # Sem o prefetch global: o checklist é buscado bloco a bloco.
+            # O streaming consome o queryset depois da view: fixa o banco de leitura agora.
+            (self.get_queryset(model).prefetch_related(None).using(router.db_for_read(model)), serializer)
+            for model, serializer, skip in (
+                (Task, TaskSerializer, archived is True),
+                (ArchivedTask, ArchivedTaskSerializer, archived is False),
+            )
+            if not skip
+        ]
+        # A compressão (gzip/br/zstd) fica com o CompressionMiddleware.
+        response = StreamingHttpResponse(
+            _export_chunks(sources, output), content_type=EXPORT_CONTENT_TYPES[output]
+        )
+        response["Content-Disposition"] = f'attachment; filename="tarefas.{output}"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="import", url_name="import")
+    def bulk_import(self, request):
+        if request.content_type.startswith("multipart/"):
+            upload = request.FILES.get("file")
+            if upload is None:
+                return Response(
+                    {"detail": "Envie o arquivo no campo 'file'."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            fmt = request.query_params.get("input") or detect_format(upload.name, upload.content_type)
+            lines = upload
+        else:
+            fmt = request.query_params.get("input") or detect_format(None, request.content_type)
+            stream = request.stream
+            lines = iter(stream.readline, b"") if stream is not None else []
+
+        if fmt not in IMPORT_FORMATS:
+            return Response(
+                {"detail": "Formato inválido. Use input=ndjson ou input=csv."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        update_fields = ["status"]
-        if task.recurrence != "nenhuma":
-            task.recurrence = "nenhuma"
-            update_fields.append("recurrence")
+        report = import_tasks(request.user, lines, fmt)
+        if report["created"]:
+            events.publish(request.user.id, "imported", data={"created": report["created"]})
+        return Response(report, status=status.HTTP_200_OK)
 
-        task.save(update_fields=update_fields)
+    @action(detail=True, methods=["post"])
+    @idempotent
+    def toggle(self, request, pk=None):
+        # Um único UPDATE condicional (com RETURNING quando o banco suporta):
+        # toques duplos concorrentes não perdem atualização.
+        if not str(pk).isdigit():
+            raise Http404
+        minimal = (
+            request.query_params.get("minimal") in ("1", "true")
+            or "return=minimal" in request.headers.get("Prefer", "")
+        )
+        task = update_returning(
+            Task.objects.filter(pk=pk, owner=request.user),
+            ["status"] if minimal else TASK_ATTNAMES,
+            status=Case(When(status="pendente", then=Value("concluida")), default=Value("pendente")),
+            completed_at=Case(When(status="pendente", then=Value(timezone.now())), default=None),
+            recurrence="nenhuma",
+        )
+        if task is None:
+            raise Http404
+        events.publish(request.user.id, "toggled", task.id, {"id": task.id, "status": task.status})
+        if minimal:
+            return Response({"id": task.id, "status": task.status}, status=status.HTTP_200_OK)
 
+        prefetch_related_objects([task], "checklist_items")
         response_serializer = TaskSerializer(task)
         return Response(response_serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=["get", "post"])
+    def checklist(self, request, pk=None):
+        if request.method == "GET":
+            task = self.get_object()
+            serializer = TaskChecklistItemSerializer(task.checklist_items.all(), many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        task = get_object_or_404(Task.objects.only("id"), pk=pk, owner=request.user)
+        serializer = TaskChecklistItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.validated_data.pop("id", None)
+        if "order" not in request.data:
+            last = task.checklist_items.aggregate(last=Max("order"))["last"]
+            serializer.validated_data["order"] = 0 if last is None else last + 1
+        item = serializer.save(task=task)
+        data = TaskChecklistItemSerializer(item).data
+        events.publish(request.user.id, "updated", task.id, {"id": task.id, "checklist_item": data})
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path=r"checklist/(?P<item_id>\d+)/toggle",
+        url_name="checklist-toggle",
+    )
+    def toggle_checklist_item(self, request, pk=None, item_id=None):
+        # Um único UPDATE; a posse da tarefa é conferida na mesma consulta e
+        # a tarefa em si (e o seu updated_at) não é tocada.
+        if not str(pk).isdigit():
+            raise Http404
+        item = update_returning(
+            TaskChecklistItem.objects.filter(pk=item_id, task_id=pk, task__owner=request.user),
+            ["label", "done", "order"],
+            done=Case(When(done=True, then=Value(False)), default=Value(True)),
+        )
+        if item is None:
+            return Response(
+                {"detail": "Item do checklist não encontrado."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        data = TaskChecklistItemSerializer(item).data
+        events.publish(request.user.id, "updated", int(pk), {"id": int(pk), "checklist_item": data})
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["post"], url_path="checklist/reorder", url_name="checklist-reorder")
+    def reorder_checklist(self, request, pk=None):
+        if not str(pk).isdigit():
+            raise Http404
+        ids = request.data.get("order")
+        if (
+            not isinstance(ids, list)
+            or not ids
+            or not all(isinstance(item_id, int) and not isinstance(item_id, bool) for item_id in ids)
+            or len(set(ids)) != len(ids)
+        ):
+            return Response(
+                {"order": ["Informe a lista de ids dos itens na nova ordem."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic(using=router.db_for_write(TaskChecklistItem)):
+            updated = TaskChecklistItem.objects.filter(
+                pk__in=ids, task_id=pk, task__owner=request.user
+            ).update(
+                order=Case(*(When(pk=item_id, then=Value(index)) for index, item_id in enumerate(ids)))
+            )
+            if updated != len(ids):
+                transaction.set_rollback(True)
+                return Response(
+                    {"order": ["Há itens que não pertencem a esta tarefa."]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        events.publish(request.user.id, "updated", int(pk), {"id": int(pk), "checklist_order": ids})
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
 
 def _normalize_email(value: str | None) -> str:
     return (value or "").strip().lower()
@@ -152,6 +495,7 @@ class VerifyEmailView(APIView):
 
         user.is_active = True
         user.save(update_fields=["is_active"])
+        pin_primary(user.id)
         EmailVerificationCode.objects.filter(user=user).delete()
         return Response(
             {"detail": "Conta verificada! Faça login para continuar.", "redirect": "login"},
@@ -306,32 +650,10 @@ class ConfirmPasswordResetView(APIView):
                 {"error": "Código ou token incorreto."}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        password_policy_msg = (
-            "A senha deve ter 8+ caracteres, com maiúscula, minúscula, número e símbolo."
-        )
-        if len(password) < 8:
-            return Response(
-                {"error": password_policy_msg},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if not re.search(r"[A-Z]", password):
+        policy = get_policy()
+        if not policy.is_valid(password):
             return Response(
-                {"error": password_policy_msg},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if not re.search(r"[a-z]", password):
-            return Response(
-                {"error": password_policy_msg},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if not re.search(r"[0-9]", password):
-            return Response(
-                {"error": password_policy_msg},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if not re.search(r"[^A-Za-z0-9]", password):
-            return Response(
-                {"error": password_policy_msg},
+                {"error": policy.summary},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
@@ -343,6 +665,7 @@ class ConfirmPasswordResetView(APIView):
 
         user.set_password(password)
         user.save(update_fields=["password"])
+        pin_primary(user.id)
         EmailVerificationCode.objects.filter(user=user).delete()
         return Response(
             {"detail": "Senha redefinida com sucesso!"},
@@ -350,9 +673,88 @@ class ConfirmPasswordResetView(APIView):
         )
 
 
+class TaskEventsView(View):
+    """
+    Stream SSE das alterações nas tarefas do usuário. O ``EventSource`` do
+    navegador não envia cabeçalhos: o access token também é aceito em ``?token=``.
+    Fora do ASGI, cada conexão devolve só o backlog e encerra (ver ``events``).
+    """
+
+    async def get(self, request):
+        user_id = await _sse_user_id(request)
+        if user_id is None:
+            return JsonResponse(
+                {"detail": "As credenciais de autenticação não foram fornecidas ou são inválidas."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+
+        # Só o ASGI mantém a conexão aberta; no WSGI ela seguraria um worker.
+        live = isinstance(request, ASGIRequest)
+        response = StreamingHttpResponse(
+            events.stream(user_id, last_event_id, live=live), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache, no-transform"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+async def _sse_user_id(request):
+    header = request.headers.get("Authorization", "")
+    raw = header[7:].strip() if header.startswith("Bearer ") else request.GET.get("token")
+    if not raw:
+        return None
+    try:
+        user_id = AccessToken(raw)[jwt_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+    if not await User.objects.filter(pk=user_id, is_active=True).aexists():
+        return None
+    return user_id
+
+
 class HealthView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
         return Response({"status": "ok"}, status=status.HTTP_200_OK)
 
+
+class ReadinessView(APIView):
+    """Verificações profundas com cache curto; 503 se alguma falhar."""
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        result, cached = health.readiness()
+        response = Response(
+            result,
+            status=status.HTTP_200_OK if result["status"] == "ok" else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response["Cache-Control"] = "no-store"
+        response["X-Health-Cached"] = "1" if cached else "0"
+        return response
+
+
+class MetricsAccess(permissions.BasePermission):
+    """Coletor do Prometheus: IP em ``METRICS_ALLOWED_IPS`` ou o ``METRICS_TOKEN``."""
+
+    def has_permission(self, request, view):
+        if request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS:
+            return True
+        token = settings.METRICS_TOKEN
+        header = request.headers.get("Authorization", "")
+        return bool(token) and hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
+
+
+class MetricsView(APIView):
+    permission_classes = [MetricsAccess]
+    authentication_classes = []
+
+    def get(self, request):
+        return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
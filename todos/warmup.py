@@ -0,0 +1,99 @@
+"""
+Aquecimento do processo antes da primeira requisição.
+
+Chamado pelos hooks do ``gunicorn.conf.py``: no master (``preload_app``) faz
+o que é herdado pelo fork — imports, URLconf, campos dos serializers, hashers,
+classes do DRF/simplejwt — e no worker abre as conexões (banco e cache), que
+não podem ser compartilhadas entre processos.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _urls():
+    from django.urls import get_resolver, reverse
+
+    resolver = get_resolver()
+    resolver.url_patterns  # importa o URLconf e as views
+    reverse("task-list")  # monta reverse_dict/namespace_dict
+    resolver.resolve("/api/tasks/")
+
+
+def _drf():
+    from rest_framework.settings import api_settings
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.state import token_backend
+
+    # As classes padrão do DRF são importadas preguiçosamente na 1ª requisição.
+    for name in (
+        "DEFAULT_RENDERER_CLASSES",
+        "DEFAULT_PARSER_CLASSES",
+        "DEFAULT_AUTHENTICATION_CLASSES",
+        "DEFAULT_PERMISSION_CLASSES",
+        "DEFAULT_CONTENT_NEGOTIATION_CLASS",
+        "EXCEPTION_HANDLER",
+    ):
+        getattr(api_settings, name)
+    JWTAuthentication()
+    token_backend.get_verifying_key(None)
+
+
+def _serializers():
+    from .importer import _serializer_fields
+    from .serializers import RegisterSerializer, TaskChecklistItemSerializer, TaskSerializer
+
+    for serializer_class in (TaskSerializer, TaskChecklistItemSerializer, RegisterSerializer):
+        serializer = serializer_class()
+        serializer.fields
+        serializer.data
+    TaskSerializer(many=True).child.fields
+    _serializer_fields()
+
+
+def _hashers():
+    from django.contrib.auth.hashers import get_hasher, get_hashers
+
+    get_hashers()
+    get_hasher("default")
+
+
+def _database():
+    from django.db import connections
+
+    for connection in connections.all():
+        # Com CONN_MAX_AGE=0 a conexão fecharia no primeiro request_started.
+        if connection.settings_dict["CONN_MAX_AGE"] != 0:
+            connection.ensure_connection()
+
+
+def _caches():
+    from django.core.cache import caches
+
+    for cache in caches.all(initialized_only=False):
+        cache.get("warmup")
+
+
+PROCESS_STEPS = (("urls", _urls), ("drf", _drf), ("serializers", _serializers), ("hashers", _hashers))
+CONNECTION_STEPS = (("database", _database), ("caches", _caches))
+
+
+def warmup(connect: bool = True) -> dict[str, float]:
+    """
+    Executa as etapas e devolve a duração de cada uma em ms. ``connect=False``
+    no master do gunicorn: conexões abertas antes do fork seriam herdadas.
+    """
+    steps = PROCESS_STEPS + (CONNECTION_STEPS if connect else ())
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:  # aquecimento nunca derruba o worker
+            logger.exception("Warmup step %s failed", name)
+        timings[name] = round((time.perf_counter() - started) * 1000, 3)
+    logger.info("Warmup done in %.1f ms: %s", sum(timings.values()), timings)
+    return timings